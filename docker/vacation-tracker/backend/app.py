@@ -1,18 +1,34 @@
+import contextlib
+import csv
+import functools
 import hashlib
+import hmac
+import ipaddress
+import io
+import json
 import os
+import secrets
 import sqlite3
-from datetime import date, datetime, timedelta
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 
+import click
 from flask import (
     Flask,
+    Response,
     flash,
     g,
+    jsonify,
     redirect,
     render_template,
     request,
     session,
     url_for,
 )
+from werkzeug.http import is_resource_modified
 from werkzeug.security import check_password_hash, generate_password_hash
 
 try:
@@ -25,6 +41,655 @@ try:
 except ImportError:  # pragma: no cover - runtime requirement documented in README
     msal = None
 
+try:
+    import psycopg  # type: ignore
+    from psycopg.rows import dict_row  # type: ignore
+except ImportError:  # pragma: no cover - only needed for DATABASE_URL=postgresql://...
+    psycopg = None
+
+try:
+    import prometheus_client  # type: ignore
+    import prometheus_client.multiprocess  # type: ignore
+except ImportError:  # pragma: no cover - /metrics is disabled without it
+    prometheus_client = None
+
+
+class ConnectionPool:
+    """Per-process pool of database connections that are configured once.
+
+    Connections are handed out one request at a time and returned at
+    teardown. The pool notices when it has been inherited across a fork
+    (e.g. gunicorn with --preload) and drops the parent's connections so
+    each worker only ever uses connections it opened itself.
+    """
+
+    def __init__(self, connect, max_idle: int):
+        self._connect = connect
+        self._max_idle = max_idle
+        self._idle: list = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "in_use": 0}
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # Never touch (or close) connections opened by the parent process.
+            self._idle = []
+            self._pid = os.getpid()
+            self._stats = {"created": 0, "reused": 0, "discarded": 0, "in_use": 0}
+
+    def acquire(self):
+        with self._lock:
+            self._check_pid()
+            self._stats["in_use"] += 1
+            if self._idle:
+                self._stats["reused"] += 1
+                return self._idle.pop()
+            self._stats["created"] += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._stats["in_use"] = max(self._stats["in_use"] - 1, 0)
+                self._stats["created"] -= 1
+            raise
+
+    def release(self, conn):
+        try:
+            # Never hand out a connection with a half-finished transaction.
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            # Broken connections (e.g. after a server restart) are dropped.
+            conn = None
+        with self._lock:
+            self._check_pid()
+            self._stats["in_use"] = max(self._stats["in_use"] - 1, 0)
+            if conn is not None and len(self._idle) < self._max_idle:
+                self._idle.append(conn)
+                return
+            self._stats["discarded"] += 1
+        if conn is not None:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._check_pid()
+            return {
+                **self._stats,
+                "idle": len(self._idle),
+                "max_idle": self._max_idle,
+                "pid": self._pid,
+            }
+
+
+class SQLiteStorage:
+    """Storage on a single SQLite file, tuned for several gunicorn workers."""
+
+    name = "sqlite"
+    integrity_error = sqlite3.IntegrityError
+    serial_primary_key = "INTEGER PRIMARY KEY AUTOINCREMENT"
+    without_rowid = " WITHOUT ROWID"
+
+    def __init__(self, path: str, busy_timeout_ms: int, cache_size_kb: int, mmap_size: int):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection and apply the per-connection pragmas once."""
+        conn = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            timeout=self.busy_timeout_ms / 1000.0,
+            # The pool guarantees a single user at a time, possibly from
+            # different threads under threaded workers.
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while a booking write is in progress.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms:d}")
+        # Negative cache_size is in KiB rather than pages.
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kb:d}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size:d}")
+        return conn
+
+    def begin_write(self, conn):
+        """Start a transaction that holds the write lock until commit."""
+        conn.execute("BEGIN IMMEDIATE")
+
+    def schema_version(self, conn) -> int:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def set_schema_version(self, conn, version: int):
+        conn.execute(f"PRAGMA user_version = {version:d}")
+
+    def column_names(self, conn, table: str) -> set[str]:
+        return {col["name"] for col in conn.execute(f"PRAGMA table_info({table})")}
+
+    def explain(self, conn, query: str, params) -> list[tuple[str, bool]]:
+        """Return (plan line, is full table scan) pairs for a query."""
+        plan = []
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params):
+            detail = row["detail"]
+            plan.append((detail, detail.startswith("SCAN") and "USING" not in detail))
+        return plan
+
+    def stream(self, conn, query: str, params):
+        # sqlite3 cursors already step through results lazily.
+        return conn.execute(query, params)
+
+
+class PostgresConnection:
+    """Adapter giving a psycopg connection the sqlite3-style calls the app uses.
+
+    Queries keep SQLite's `?` placeholders and rows support `row["name"]`.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    @staticmethod
+    def _sql(query: str) -> str:
+        return query.replace("%", "%%").replace("?", "%s")
+
+    def execute(self, query: str, params=None):
+        cursor = self._conn.cursor()
+        if params is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(self._sql(query), params)
+        return cursor
+
+    def executemany(self, query: str, seq_of_params):
+        cursor = self._conn.cursor()
+        cursor.executemany(self._sql(query), seq_of_params)
+        return cursor
+
+    def stream(self, query: str, params):
+        # A named (server-side) cursor fetches rows in batches instead of
+        # materialising the whole result set on the client.
+        cursor = self._conn.cursor(name=f"stream_{secrets.token_hex(4)}")
+        cursor.itersize = 500
+        cursor.execute(self._sql(query), params)
+        return cursor
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class PostgresStorage:
+    """Storage on PostgreSQL, so several replicas can share one database."""
+
+    name = "postgresql"
+    serial_primary_key = "BIGSERIAL PRIMARY KEY"
+    without_rowid = ""
+    # Arbitrary application-wide key for pg_advisory_xact_lock.
+    WRITE_LOCK_KEY = 0x7661636174696F6E
+
+    def __init__(self, url: str):
+        if psycopg is None:
+            raise RuntimeError("DATABASE_URL points to PostgreSQL but psycopg is not installed.")
+        self.url = url
+        self.integrity_error = psycopg.IntegrityError
+
+    def connect(self) -> PostgresConnection:
+        conn = psycopg.connect(self.url, row_factory=dict_row)
+        # CURRENT_TIMESTAMP values are stored and shown as UTC, as in SQLite.
+        conn.execute("SET TIME ZONE 'UTC'")
+        conn.commit()
+        return PostgresConnection(conn)
+
+    def begin_write(self, conn):
+        """Serialize writers that need check-then-write semantics."""
+        conn.execute("SELECT pg_advisory_xact_lock(?)", (self.WRITE_LOCK_KEY,))
+
+    def schema_version(self, conn) -> int:
+        # Read-only: this also runs before init_db takes the write lock, and
+        # concurrent CREATE TABLE IF NOT EXISTS can fail on PostgreSQL. Query
+        # pg_tables rather than to_regclass(): the advisory lock does not
+        # refresh the catalog cache, but a plain query sees the latest commit.
+        row = conn.execute(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM pg_catalog.pg_tables
+                WHERE schemaname = current_schema() AND tablename = 'schema_version'
+            ) AS present
+            """
+        ).fetchone()
+        if not row["present"]:
+            return 0
+        row = conn.execute("SELECT version FROM schema_version WHERE id = 1").fetchone()
+        return row["version"] if row else 0
+
+    def set_schema_version(self, conn, version: int):
+        """Record the version; only called while holding the write lock."""
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            INSERT INTO schema_version (id, version) VALUES (1, ?)
+            ON CONFLICT (id) DO UPDATE SET version = excluded.version
+            """,
+            (version,),
+        )
+
+    def column_names(self, conn, table: str) -> set[str]:
+        rows = conn.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = ?
+            """,
+            (table,),
+        )
+        return {row["column_name"] for row in rows}
+
+    def explain(self, conn, query: str, params) -> list[tuple[str, bool]]:
+        """Return (plan line, is full table scan) pairs for a query.
+
+        Sequential scans are disabled for the check, so the plan shows
+        whether an index is usable at all rather than what the planner
+        prefers on a small table.
+        """
+        conn.execute("SET LOCAL enable_seqscan = off")
+        plan = []
+        for row in conn.execute(f"EXPLAIN {query}", params):
+            detail = row["QUERY PLAN"]
+            plan.append((detail, "Seq Scan" in detail))
+        conn.rollback()
+        return plan
+
+    def stream(self, conn, query: str, params):
+        return conn.stream(query, params)
+
+
+class TimedCursor:
+    """Cursor proxy that adds time spent fetching rows to its connection."""
+
+    def __init__(self, cursor, conn: "TimedConnection"):
+        self._cursor = cursor
+        self._conn = conn
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return self._cursor.fetchone()
+        finally:
+            self._conn.seconds += time.perf_counter() - started
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return self._cursor.fetchall()
+        finally:
+            self._conn.seconds += time.perf_counter() - started
+
+    def __iter__(self):
+        while True:
+            started = time.perf_counter()
+            rows = self._cursor.fetchmany(500)
+            self._conn.seconds += time.perf_counter() - started
+            if not rows:
+                return
+            yield from rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    """Per-request wrapper around a pooled connection.
+
+    Counts statements and the wall time spent in the database (executing,
+    fetching and committing) so the request hooks can report them.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = 0
+        self.seconds = 0.0
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def execute(self, *args):
+        self.statements += 1
+        return TimedCursor(self._timed(self.conn.execute, *args), self)
+
+    def executemany(self, *args):
+        self.statements += 1
+        return self._timed(self.conn.executemany, *args)
+
+    def commit(self):
+        return self._timed(self.conn.commit)
+
+    def rollback(self):
+        return self._timed(self.conn.rollback)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class BoundedCallRunner:
+    """Runs blocking calls on a small thread pool under a deadline.
+
+    At most `max_concurrent` calls are in flight at once. `call` raises
+    TimeoutError if no slot frees up, or the call does not finish, within
+    `timeout` seconds. A call that timed out keeps its slot until it really
+    returns, so a hung backend cannot pile up threads.
+    """
+
+    def __init__(self, max_concurrent: int, timeout: float, name: str):
+        self._timeout = timeout
+        self._max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "in_flight": 0, "busy": 0, "timeouts": 0}
+
+    def _release(self, _future):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+        self._slots.release()
+
+    def call(self, fn, *args, **kwargs):
+        deadline = time.monotonic() + self._timeout
+        if not self._slots.acquire(timeout=self._timeout):
+            with self._lock:
+                self._stats["busy"] += 1
+            raise TimeoutError(f"all {self._max_concurrent} slots busy")
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["in_flight"] += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0.0))
+        except TimeoutError:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "max_concurrent": self._max_concurrent,
+                "timeout_seconds": self._timeout,
+            }
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after `ttl` seconds."""
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float, max_entries: int = 1024, on_lookup=None):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Optional callable(hit: bool), e.g. a metrics counter.
+        self._on_lookup = on_lookup
+
+    def get_or_set(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            expires_at, value = self._entries.get(key, (0.0, self._MISSING))
+            hit = value is not self._MISSING and expires_at > now
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+        if hit:
+            return value
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                # Drop expired entries first, then fall back to clearing.
+                self._entries = {
+                    k: v for k, v in self._entries.items() if v[0] > now
+                }
+                if len(self._entries) >= self._max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self._ttl, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "ttl_seconds": self._ttl,
+            }
+
+
+class VersionedCache:
+    """Bounded LRU cache whose entries are only valid for one version stamp.
+
+    Callers read a cheap version marker (e.g. from the database) and pass it
+    to `get`; an entry built for any other version counts as a miss.
+    """
+
+    def __init__(self, max_entries: int = 64, on_lookup=None):
+        self._max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Optional callable(hit: bool), e.g. a metrics counter.
+        self._on_lookup = on_lookup
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and entry[0] == version
+            if hit:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if self._on_lookup is not None:
+            self._on_lookup(hit)
+        return entry[1] if hit else None
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+            }
+
+
+class RequestMetrics:
+    """Prometheus metrics for requests, SQL, caches and the auth paths.
+
+    With PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) every worker
+    writes its samples to files in that directory and a scrape of /metrics
+    on any worker reports the sum over all of them. Without
+    prometheus_client installed, recording does nothing.
+    """
+
+    SQL_STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+    def __init__(self):
+        self.enabled = prometheus_client is not None
+        if not self.enabled:
+            return
+        # A registry per app keeps create_app() callable more than once.
+        self.registry = prometheus_client.CollectorRegistry()
+        self.request_seconds = prometheus_client.Histogram(
+            "vacation_tracker_request_duration_seconds",
+            "Request latency by endpoint.",
+            ["endpoint", "method"],
+            registry=self.registry,
+        )
+        self.requests = prometheus_client.Counter(
+            "vacation_tracker_requests_total",
+            "Requests by endpoint and status code.",
+            ["endpoint", "method", "status"],
+            registry=self.registry,
+        )
+        self.sql_statements = prometheus_client.Histogram(
+            "vacation_tracker_sql_statements",
+            "SQL statements executed per request.",
+            ["endpoint"],
+            buckets=self.SQL_STATEMENT_BUCKETS,
+            registry=self.registry,
+        )
+        self.db_seconds = prometheus_client.Histogram(
+            "vacation_tracker_db_duration_seconds",
+            "Time spent in the database per request.",
+            ["endpoint"],
+            registry=self.registry,
+        )
+        self.auth_seconds = prometheus_client.Histogram(
+            "vacation_tracker_auth_duration_seconds",
+            "Time spent authenticating, by path (pam, internal, entra_token).",
+            ["path"],
+            registry=self.registry,
+        )
+        self.cache_lookups = prometheus_client.Counter(
+            "vacation_tracker_cache_lookups_total",
+            "In-process cache lookups by cache and result.",
+            ["cache", "result"],
+            registry=self.registry,
+        )
+
+    def observe_request(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        seconds: float,
+        statements: int,
+        db_seconds: float,
+    ):
+        if not self.enabled:
+            return
+        self.request_seconds.labels(endpoint, method).observe(seconds)
+        self.requests.labels(endpoint, method, str(status)).inc()
+        self.sql_statements.labels(endpoint).observe(statements)
+        self.db_seconds.labels(endpoint).observe(db_seconds)
+
+    @contextlib.contextmanager
+    def time_auth(self, path: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.auth_seconds.labels(path).observe(time.perf_counter() - started)
+
+    def cache_recorder(self, cache: str):
+        """Return an `on_lookup` callback for TTLCache/VersionedCache."""
+        if not self.enabled:
+            return None
+        hits = self.cache_lookups.labels(cache, "hit")
+        misses = self.cache_lookups.labels(cache, "miss")
+        return lambda hit: (hits if hit else misses).inc()
+
+    def render(self) -> tuple[bytes, str]:
+        registry = self.registry
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = prometheus_client.CollectorRegistry()
+            prometheus_client.multiprocess.MultiProcessCollector(registry)
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+@functools.lru_cache(maxsize=4096)
+def color_for_username(username: str) -> str:
+    """Return a stable HSL colour per user, consistent across months and views."""
+    digest = hashlib.sha256(username.encode("utf-8")).digest()
+    hue = (digest[0] / 255.0) * 360.0
+    saturation = 55 + (digest[1] % 30)  # 55–84%
+    lightness = 40 + (digest[2] % 20)   # 40–59%
+    return f"hsl({hue:.0f}, {saturation}%, {lightness}%)"
+
+
+def csv_escape(value):
+    """Neutralise spreadsheet formulas (CSV injection) by quoting risky leading characters."""
+    if isinstance(value, str) and value.startswith(("=", "+", "-", "@", "\t", "\r")):
+        return "'" + value
+    return value
+
+
+def ics_escape(value: str) -> str:
+    """Escape a TEXT value for iCalendar (RFC 5545, section 3.3.11)."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def ics_fold(line: str) -> str:
+    """Fold a content line to 75 octets and terminate it with CRLF."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        chunk = encoded[:limit]
+        # Do not split inside a multi-byte UTF-8 sequence.
+        while chunk and len(chunk) < len(encoded) and (encoded[len(chunk)] & 0xC0) == 0x80:
+            chunk = chunk[:-1]
+        parts.append(chunk.decode("utf-8"))
+        encoded = encoded[len(chunk):]
+    return "\r\n ".join(parts) + "\r\n"
+
 
 def create_app():
     app = Flask(__name__)
@@ -35,42 +700,127 @@ def create_app():
     app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "dev-change-me")
     # Expose auth backend choice to templates and helpers.
     app.config["AUTH_BACKEND"] = os.environ.get("AUTH_BACKEND", "pam").lower()
+    # Admins from the environment are fixed for the lifetime of the process.
+    app.config["ADMIN_USERS"] = frozenset(
+        item.strip() for item in os.environ.get("ADMIN_USERS", "").split(",") if item.strip()
+    )
+    app.config["ADMIN_CACHE_TTL"] = float(os.environ.get("ADMIN_CACHE_TTL", "30"))
+    # Seconds a worker trusts a successful API Basic-auth check (0 disables).
+    app.config["API_AUTH_CACHE_TTL"] = float(os.environ.get("API_AUTH_CACHE_TTL", "60"))
+    app.config["OVERVIEW_PAGE_SIZE"] = int(os.environ.get("OVERVIEW_PAGE_SIZE", "100"))
+    # Local times used for half-day slots in iCalendar exports.
+    app.config["ICS_HALF_DAY_HOURS"] = {"am": ("080000", "120000"), "pm": ("130000", "170000")}
+    app.config["ICS_UID_DOMAIN"] = os.environ.get("ICS_UID_DOMAIN", "vacation-tracker")
+    # Subscription feeds include bookings that ended at most this many days ago.
+    app.config["FEED_HISTORY_DAYS"] = int(os.environ.get("FEED_HISTORY_DAYS", "365"))
+    # PostgreSQL connection URL; when unset the SQLite file above is used.
+    app.config["DATABASE_URL"] = os.environ.get("DATABASE_URL", "")
+    # Connection pool size and SQLite per-connection tuning.
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("DB_POOL_SIZE", "8"))
+    app.config["DB_BUSY_TIMEOUT_MS"] = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+    app.config["DB_CACHE_SIZE_KB"] = int(os.environ.get("DB_CACHE_SIZE_KB", "20000"))
+    app.config["DB_MMAP_SIZE"] = int(os.environ.get("DB_MMAP_SIZE", str(128 * 1024 * 1024)))
+    # Entra sign-in host (sovereign clouds, or a local fake for load tests) and
+    # the HTTP timeout for calls to it, so a slow Entra cannot pin a worker thread.
+    app.config["ENTRA_AUTHORITY_HOST"] = os.environ.get(
+        "ENTRA_AUTHORITY_HOST", "https://login.microsoftonline.com"
+    ).rstrip("/")
+    app.config["ENTRA_HTTP_TIMEOUT"] = float(os.environ.get("ENTRA_HTTP_TIMEOUT", "10"))
+    # werkzeug hash method for local passwords, e.g. "scrypt:16384:8:1" or
+    # "pbkdf2:sha256:600000"; stored hashes follow it on the next login.
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # PAM calls run on a bounded pool; a login waits at most PAM_TIMEOUT seconds.
+    app.config["PAM_TIMEOUT"] = float(os.environ.get("PAM_TIMEOUT", "5"))
+    app.config["PAM_MAX_CONCURRENT"] = int(os.environ.get("PAM_MAX_CONCURRENT", "4"))
+    # /metrics answers requests carrying "Authorization: Bearer <token>" or
+    # coming from one of these comma-separated addresses/networks; with
+    # neither configured it refuses every scrape.
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN", "")
+    app.config["METRICS_ALLOW_FROM"] = [
+        ipaddress.ip_network(entry.strip(), strict=False)
+        for entry in os.environ.get("METRICS_ALLOW_FROM", "").split(",")
+        if entry.strip()
+    ]
 
     os.makedirs(app.instance_path, exist_ok=True)
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+    metrics = RequestMetrics()
+    app.extensions["metrics"] = metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        # The request context is already gone in teardown_appcontext.
+        g.request_labels = (request.endpoint or "unmatched", request.method)
+
+    @app.after_request
+    def record_response_status(response):
+        g.response_status = response.status_code
+        return response
 
     @app.before_request
     def load_logged_in_user():
         username = session.get("username")
         g.user = username if username else None
 
+    if app.config["DATABASE_URL"].startswith(("postgres://", "postgresql://")):
+        storage = PostgresStorage(app.config["DATABASE_URL"])
+    else:
+        storage = SQLiteStorage(
+            app.config["DATABASE"],
+            busy_timeout_ms=app.config["DB_BUSY_TIMEOUT_MS"],
+            cache_size_kb=app.config["DB_CACHE_SIZE_KB"],
+            mmap_size=app.config["DB_MMAP_SIZE"],
+        )
+    app.extensions["storage"] = storage
+
+    db_pool = ConnectionPool(storage.connect, max_idle=app.config["DB_POOL_SIZE"])
+    app.extensions["db_pool"] = db_pool
+
     def get_db():
         if "db" not in g:
-            g.db = sqlite3.connect(
-                app.config["DATABASE"], detect_types=sqlite3.PARSE_DECLTYPES
-            )
-            g.db.row_factory = sqlite3.Row
+            g.db = TimedConnection(db_pool.acquire())
         return g.db
 
     @app.teardown_appcontext
     def close_db(exc=None):
         db = g.pop("db", None)
         if db is not None:
-            db.close()
+            db_pool.release(db.conn)
+        started = g.pop("request_started", None)
+        if started is None:
+            # App contexts outside a request (CLI, startup migrations).
+            return
+        endpoint, method = g.pop("request_labels")
+        status = g.pop("response_status", 500 if exc is not None else 200)
+        metrics.observe_request(
+            endpoint,
+            method,
+            status,
+            time.perf_counter() - started,
+            db.statements if db is not None else 0,
+            db.seconds if db is not None else 0.0,
+        )
 
-    def init_db():
-        db = get_db()
-        db.executescript(
-            """
+    def migrate_baseline(db):
+        """Create the original tables and backfill columns added over time."""
+        db.execute(
+            f"""
             CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id {storage.serial_primary_key},
                 username TEXT NOT NULL UNIQUE,
                 password_hash TEXT NOT NULL,
                 is_admin INTEGER NOT NULL DEFAULT 0,
                 created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-
+            )
+            """
+        )
+        db.execute(
+            f"""
             CREATE TABLE IF NOT EXISTS vacations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id {storage.serial_primary_key},
                 username TEXT NOT NULL,
                 start_date DATE NOT NULL,
                 end_date DATE NOT NULL,
@@ -78,8 +828,11 @@ def create_app():
                 edited_at TIMESTAMP,
                 comment TEXT,
                 slot TEXT
-            );
-
+            )
+            """
+        )
+        db.execute(
+            """
             CREATE TABLE IF NOT EXISTS entra_config (
                 id INTEGER PRIMARY KEY CHECK (id = 1),
                 tenant_id TEXT,
@@ -88,17 +841,15 @@ def create_app():
                 enabled INTEGER NOT NULL DEFAULT 0,
                 registration_token TEXT,
                 updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
+            )
             """
         )
-        # Ensure new columns exist for older databases.
-        user_columns = db.execute("PRAGMA table_info(users)").fetchall()
-        user_col_names = {col["name"] for col in user_columns}
+        # Ensure new columns exist for databases created before versioning.
+        user_col_names = storage.column_names(db, "users")
         if "is_admin" not in user_col_names:
             db.execute("ALTER TABLE users ADD COLUMN is_admin INTEGER NOT NULL DEFAULT 0")
         # Ensure edited_at and comment columns exist for older databases.
-        columns = db.execute("PRAGMA table_info(vacations)").fetchall()
-        col_names = {col["name"] for col in columns}
+        col_names = storage.column_names(db, "vacations")
         if "edited_at" not in col_names:
             db.execute("ALTER TABLE vacations ADD COLUMN edited_at TIMESTAMP")
         if "comment" not in col_names:
@@ -106,30 +857,209 @@ def create_app():
         if "slot" not in col_names:
             db.execute("ALTER TABLE vacations ADD COLUMN slot TEXT")
         # Ensure there is a single entra_config row.
-        entra_columns = db.execute("PRAGMA table_info(entra_config)").fetchall()
-        entra_col_names = {col["name"] for col in entra_columns}
+        entra_col_names = storage.column_names(db, "entra_config")
         if "registration_token" not in entra_col_names:
             db.execute("ALTER TABLE entra_config ADD COLUMN registration_token TEXT")
         row = db.execute("SELECT id FROM entra_config WHERE id = 1").fetchone()
         if row is None:
             db.execute("INSERT INTO entra_config (id, enabled) VALUES (1, 0)")
+
+    def migrate_vacation_indexes(db):
+        """Index the per-user and month-window lookups on vacations."""
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacations_username_start "
+            "ON vacations (username, start_date)"
+        )
+        db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vacations_start_end "
+            "ON vacations (start_date, end_date)"
+        )
+        db.execute("ANALYZE vacations")
+
+    def migrate_calendar_month_versions(db):
+        """Track a change counter per calendar month for grid caching."""
+        db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS calendar_month_versions (
+                month TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ){storage.without_rowid}
+            """
+        )
+
+    def migrate_feed_tokens(db):
+        """Secret tokens for per-user iCalendar subscription URLs."""
+        db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feed_tokens (
+                username TEXT PRIMARY KEY,
+                token TEXT NOT NULL UNIQUE,
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
+    def migrate_entra_config_version(db):
+        """Change counter so workers can cache the SSO settings row."""
+        db.execute("ALTER TABLE entra_config ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def migrate_calendar_month_changed_at(db):
+        """Record when each month last changed, deletes included."""
+        db.execute("ALTER TABLE calendar_month_versions ADD COLUMN changed_at TIMESTAMP")
+
+    # Ordered schema migrations; migration N brings the database to schema
+    # version N (PRAGMA user_version on SQLite). Only ever append to this list.
+    MIGRATIONS = [
+        migrate_baseline,
+        migrate_vacation_indexes,
+        migrate_calendar_month_versions,
+        migrate_feed_tokens,
+        migrate_entra_config_version,
+        migrate_calendar_month_changed_at,
+    ]
+    SCHEMA_VERSION = len(MIGRATIONS)
+
+    def init_db() -> int:
+        """Apply pending schema migrations and return the resulting version."""
+        db = get_db()
+        current = storage.schema_version(db)
         db.commit()
+        if current >= SCHEMA_VERSION:
+            return current
+        # Take the write lock before re-reading the version so concurrent
+        # workers starting up do not apply the same migration twice.
+        storage.begin_write(db)
+        try:
+            current = storage.schema_version(db)
+            for version in range(current + 1, SCHEMA_VERSION + 1):
+                MIGRATIONS[version - 1](db)
+                storage.set_schema_version(db, version)
+                app.logger.info("Applied schema migration %d.", version)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return SCHEMA_VERSION
 
     @app.cli.command("init-db")
     def init_db_command():
         """Initialize the database tables."""
+        version = init_db()
+        print(f"Initialized the database (schema version {version}).")
+
+    # Queries on the request hot path. Views execute these exact strings so
+    # that `flask explain-queries` shows the plans production actually uses.
+    CALENDAR_MONTH_QUERY = """
+        SELECT id, username, start_date, end_date, comment, slot
+        FROM vacations
+        WHERE (start_date <= ? AND end_date >= ?)
+        ORDER BY start_date, username
+    """
+    OVERVIEW_QUERY = """
+        SELECT id, username, start_date, end_date, created_at, edited_at, comment, slot
+        FROM vacations
+    """
+    BOOKING_CONFLICT_QUERY = """
+        SELECT 1 FROM vacations
+        WHERE username = ? AND start_date <= ? AND end_date >= ?
+    """
+
+    def overview_query(
+        username: str | None,
+        date_from: date | None,
+        date_to: date | None,
+        before: tuple[date, int] | None,
+        limit: int,
+    ) -> tuple[str, list[object]]:
+        """Build one keyset page of bookings, newest first.
+
+        Pages are ordered by (start_date, id) descending; `before` is the
+        (start_date, id) of the last row on the previous page. Date filters
+        select bookings overlapping the [date_from, date_to] range.
+        """
+        clauses = []
+        params: list[object] = []
+        if username:
+            clauses.append("username = ?")
+            params.append(username)
+        if date_from:
+            clauses.append("end_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("start_date <= ?")
+            params.append(date_to)
+        if before:
+            clauses.append("(start_date, id) < (?, ?)")
+            params.extend(before)
+        query = OVERVIEW_QUERY
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY start_date DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return query, params
+
+    @app.cli.command("explain-queries")
+    def explain_queries_command():
+        """Print the query plans (EXPLAIN) for the hot queries.
+
+        Exits non-zero if any of them falls back to a full table scan.
+        """
+        today = date.today()
+        samples = {
+            "calendar month": (CALENDAR_MONTH_QUERY, (today, today.replace(day=1))),
+            "overview (all users, next page)": overview_query(
+                None, None, None, (today, 1), 100
+            ),
+            "overview (one user, date range)": overview_query(
+                "example", today.replace(day=1), today, None, 100
+            ),
+            "booking conflict": (
+                BOOKING_CONFLICT_QUERY + " LIMIT 1",
+                ("example", today, today),
+            ),
+        }
+        db = get_db()
+        full_scans = []
+        for name, (query, params) in samples.items():
+            print(f"{name}:")
+            for detail, is_full_scan in storage.explain(db, query, params):
+                print(f"  {detail}")
+                if is_full_scan:
+                    full_scans.append(name)
+        if full_scans:
+            raise SystemExit(f"Full table scan in: {', '.join(full_scans)}")
+
+    # Migrate once per process at startup so requests never run schema work.
+    with app.app_context():
         init_db()
-        print("Initialized the database.")
 
-    def authenticate_with_pam(username: str, password: str) -> bool:
-        """Authenticate against local Linux accounts via PAM."""
+    pam_runner = BoundedCallRunner(
+        app.config["PAM_MAX_CONCURRENT"], app.config["PAM_TIMEOUT"], name="pam"
+    )
+
+    def authenticate_with_pam(username: str, password: str) -> bool | None:
+        """Authenticate against local Linux accounts via PAM.
+
+        Returns None when PAM did not answer within PAM_TIMEOUT (e.g. a slow
+        LDAP/SSSD backend), so callers can tell that apart from bad credentials.
+        """
         if pam is None:
             app.logger.error("PAM module is not available; refusing all logins.")
             return False
 
         service = os.environ.get("PAM_SERVICE", "login")
         p = pam.pam()
-        ok = p.authenticate(username, password, service=service)
+        try:
+            with metrics.time_auth("pam"):
+                ok = pam_runner.call(p.authenticate, username, password, service=service)
+        except TimeoutError as exc:
+            app.logger.warning(
+                "PAM authentication for user '%s' via service '%s' timed out: %s",
+                username,
+                service,
+                exc,
+            )
+            return None
         if not ok:
             reason = getattr(p, "reason", "unknown reason")
             app.logger.warning(
@@ -140,31 +1070,84 @@ def create_app():
             )
         return bool(ok)
 
+    # The fully spelled-out method (e.g. "scrypt:32768:8:1") that werkzeug
+    # records in each hash. Hashing once here also rejects a bad setting at startup.
+    password_hash_method = generate_password_hash(
+        "", method=app.config["PASSWORD_HASH_METHOD"]
+    ).split("$", 1)[0]
+
+    def hash_password(password: str) -> str:
+        return generate_password_hash(password, method=password_hash_method)
+
     def authenticate_internal(username: str, password: str) -> bool:
-        """Authenticate against usernames/passwords stored in the app database."""
+        """Authenticate against usernames/passwords stored in the app database.
+
+        A hash written with another method or cost than PASSWORD_HASH_METHOD
+        is replaced after a successful check, so changing the setting moves
+        users over as they log in.
+        """
         db = get_db()
         row = db.execute(
             "SELECT password_hash FROM users WHERE username = ?", (username,)
         ).fetchone()
         if row is None:
             return False
-        return check_password_hash(row["password_hash"], password)
+        stored_hash = row["password_hash"]
+        with metrics.time_auth("internal"):
+            ok = check_password_hash(stored_hash, password)
+        if ok and stored_hash.split("$", 1)[0] != password_hash_method:
+            # Compare-and-set so a concurrent password change is never undone.
+            db.execute(
+                "UPDATE users SET password_hash = ? WHERE username = ? AND password_hash = ?",
+                (hash_password(password), username, stored_hash),
+            )
+            db.commit()
+        return ok
 
     def active_auth_backend() -> str:
         return app.config.get("AUTH_BACKEND", os.environ.get("AUTH_BACKEND", "pam")).lower()
 
+    # DB admin flags per username. Grants and revokes in this process
+    # invalidate their entry; other workers pick them up within the TTL.
+    admin_cache = TTLCache(
+        ttl=app.config["ADMIN_CACHE_TTL"], on_lookup=metrics.cache_recorder("admin")
+    )
+
     def is_admin_user(username: str | None) -> bool:
         if not username:
             return False
+        if username in app.config["ADMIN_USERS"]:
+            return True
+        # Views and the template context processor ask repeatedly per request.
+        flags = g.setdefault("admin_flags", {})
+        if username not in flags:
+            flags[username] = admin_cache.get_or_set(
+                username, lambda: lookup_admin_flag(username)
+            )
+        return flags[username]
+
+    def lookup_admin_flag(username: str) -> bool:
         db = get_db()
         row = db.execute(
             "SELECT is_admin FROM users WHERE username = ?", (username,)
         ).fetchone()
-        db_flag = bool(row["is_admin"]) if row and "is_admin" in row.keys() else False
-        admins_env = os.environ.get("ADMIN_USERS", "")
-        admins = {item.strip() for item in admins_env.split(",") if item.strip()}
-        env_flag = username in admins
-        return db_flag or env_flag
+        return bool(row["is_admin"]) if row else False
+
+    def invalidate_admin_flag(username: str):
+        admin_cache.invalidate(username)
+        g.pop("admin_flags", None)
+
+    # Successful API Basic-auth checks, keyed on an HMAC of the credentials
+    # with a per-process secret so the cache never holds a plain digest of a
+    # password. Password changes and user deletions in this process clear it;
+    # other workers stop accepting the old password within the TTL.
+    api_auth_cache = TTLCache(
+        ttl=app.config["API_AUTH_CACHE_TTL"], on_lookup=metrics.cache_recorder("api_auth")
+    )
+    api_auth_cache_key = secrets.token_bytes(32)
+
+    # Let any template colour a username without recomputing the hash.
+    app.jinja_env.globals["user_color"] = color_for_username
 
     @app.context_processor
     def inject_role_flags():
@@ -175,36 +1158,76 @@ def create_app():
             and session.get("auth_source") != "sso",
         }
 
+    entra_config_cache = VersionedCache(
+        max_entries=1, on_lookup=metrics.cache_recorder("entra_config")
+    )
+
     def get_entra_config():
-        # Ensure schema exists before reading configuration.
-        init_db()
+        """Return the SSO settings; callers must not modify the shared dict.
+
+        Only the row's version counter is read per call; the full row is
+        reloaded after admin_entra saves new settings (on any worker).
+        """
         db = get_db()
+        marker = db.execute("SELECT version FROM entra_config WHERE id = 1").fetchone()
+        if marker is None:
+            return None
+        config = entra_config_cache.get("entra", marker["version"])
+        if config is not None:
+            return config
         row = db.execute(
             """
-            SELECT tenant_id, client_id, client_secret, enabled, registration_token
+            SELECT tenant_id, client_id, client_secret, enabled, registration_token, version
             FROM entra_config
             WHERE id = 1
             """
         ).fetchone()
         if row is None:
             return None
-        return {
+        config = {
             "tenant_id": row["tenant_id"],
             "client_id": row["client_id"],
             "client_secret": row["client_secret"],
             "enabled": bool(row["enabled"]),
             "registration_token": row["registration_token"],
         }
+        entra_config_cache.set("entra", row["version"], config)
+        return config
+
+    # One MSAL client per worker, keyed on everything that shapes it.
+    msal_clients: dict = {}
+    msal_clients_lock = threading.Lock()
 
     def build_msal_app(config: dict):
+        """Return this worker's MSAL client for the given Entra config.
+
+        Creating a client fetches the tenant's OpenID metadata, so it is built
+        once and reused until the host, tenant, client ID or secret change.
+        """
         if msal is None:
             return None
-        authority = f"https://login.microsoftonline.com/{config['tenant_id']}"
-        return msal.ConfidentialClientApplication(
+        host = app.config["ENTRA_AUTHORITY_HOST"]
+        key = (
+            host,
+            config["tenant_id"],
             config["client_id"],
-            authority=authority,
-            client_credential=config["client_secret"],
+            hashlib.sha256((config["client_secret"] or "").encode()).hexdigest(),
         )
+        with msal_clients_lock:
+            client = msal_clients.get(key)
+            if client is None:
+                client = msal.ConfidentialClientApplication(
+                    config["client_id"],
+                    authority=f"{host}/{config['tenant_id']}",
+                    client_credential=config["client_secret"],
+                    # Instance discovery always asks the public cloud; skip it for other hosts.
+                    instance_discovery=host == "https://login.microsoftonline.com",
+                    timeout=app.config["ENTRA_HTTP_TIMEOUT"],
+                )
+                # Only the current config is ever used again.
+                msal_clients.clear()
+                msal_clients[key] = client
+        return client
 
     @app.route("/login", methods=["GET", "POST"])
     def login():
@@ -221,7 +1244,9 @@ def create_app():
                 else:
                     ok = authenticate_with_pam(username, password)
 
-                if not ok:
+                if ok is None:
+                    flash("Login is temporarily unavailable, please try again in a moment.", "error")
+                elif not ok:
                     flash("Invalid username or password.", "error")
                 else:
                     session.clear()
@@ -247,7 +1272,13 @@ def create_app():
             )
             return redirect(url_for("login"))
 
-        client = build_msal_app(config)
+        try:
+            # Building the client fetches the tenant's OpenID configuration.
+            client = build_msal_app(config)
+        except (OSError, ValueError) as exc:
+            app.logger.warning("Entra discovery failed: %s", exc)
+            flash("SSO login failed: Microsoft Entra did not respond.", "error")
+            return redirect(url_for("login"))
         if client is None:
             flash("SSO is not available on this server.", "error")
             return redirect(url_for("login"))
@@ -279,17 +1310,36 @@ def create_app():
             flash("SSO login failed: missing authorization code.", "error")
             return redirect(url_for("login"))
 
-        client = build_msal_app(config)
-        if client is None:
-            flash("SSO is not available on this server.", "error")
+        redirect_uri = url_for("entra_callback", _external=True)
+        try:
+            client = build_msal_app(config)
+            if client is None:
+                flash("SSO is not available on this server.", "error")
+                return redirect(url_for("login"))
+            with metrics.time_auth("entra_token"):
+                result = client.acquire_token_by_authorization_code(
+                    code,
+                    scopes=["User.Read"],
+                    redirect_uri=redirect_uri,
+                )
+            # Only the ID token claims are used, once; don't let the shared
+            # client's token cache collect every user's tokens.
+            for account in client.get_accounts():
+                client.remove_account(account)
+        except (OSError, ValueError) as exc:
+            # requests' connection errors and timeouts are OSErrors.
+            app.logger.warning("Entra token exchange failed: %s", exc)
+            flash("SSO login failed: Microsoft Entra did not respond.", "error")
             return redirect(url_for("login"))
 
-        redirect_uri = url_for("entra_callback", _external=True)
-        result = client.acquire_token_by_authorization_code(
-            code,
-            scopes=["User.Read"],
-            redirect_uri=redirect_uri,
-        )
+        if "error" in result:
+            app.logger.warning(
+                "Entra token exchange failed: %s: %s",
+                result.get("error"),
+                result.get("error_description"),
+            )
+            flash("SSO login failed: the sign-in was rejected.", "error")
+            return redirect(url_for("login"))
 
         id_claims = result.get("id_token_claims") or {}
         # Prefer display name from Entra over email-style identifiers.
@@ -312,9 +1362,13 @@ def create_app():
         ).fetchone()
         if existing is None:
             # Create with a random placeholder password hash; password is not used for SSO accounts.
-            placeholder_password = generate_password_hash(os.urandom(16).hex())
+            placeholder_password = hash_password(os.urandom(16).hex())
+            # Concurrent first logins of the same account race to this insert.
             db.execute(
-                "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                """
+                INSERT INTO users (username, password_hash) VALUES (?, ?)
+                ON CONFLICT (username) DO NOTHING
+                """,
                 (username, placeholder_password),
             )
             db.commit()
@@ -362,10 +1416,11 @@ def create_app():
                 try:
                     db.execute(
                         "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-                        (username, generate_password_hash(password)),
+                        (username, hash_password(password)),
                     )
                     db.commit()
-                except sqlite3.IntegrityError:
+                except storage.integrity_error:
+                    db.rollback()
                     flash("Username is already taken.", "error")
                 else:
                     flash("Account created. You can now log in.", "success")
@@ -401,9 +1456,10 @@ def create_app():
                 db = get_db()
                 db.execute(
                     "UPDATE users SET password_hash = ? WHERE username = ?",
-                    (generate_password_hash(new_password), g.user),
+                    (hash_password(new_password), g.user),
                 )
                 db.commit()
+                api_auth_cache.clear()
                 flash("Password updated successfully.", "success")
                 return redirect(url_for("calendar_view"))
 
@@ -461,6 +1517,7 @@ def create_app():
             (is_admin_value, username),
         )
         db.commit()
+        invalidate_admin_flag(username)
         if action == "grant":
             flash(f"User {username} is now an admin.", "success")
         else:
@@ -502,7 +1559,7 @@ def create_app():
                     db.execute(
                         """
                         UPDATE entra_config
-                        SET tenant_id = ?, client_id = ?, client_secret = ?, registration_token = ?, enabled = ?, updated_at = CURRENT_TIMESTAMP
+                        SET tenant_id = ?, client_id = ?, client_secret = ?, registration_token = ?, enabled = ?, updated_at = CURRENT_TIMESTAMP, version = version + 1
                         WHERE id = 1
                         """,
                         (tenant_id, client_id, client_secret, registration_token, int(enabled)),
@@ -511,7 +1568,7 @@ def create_app():
                     db.execute(
                         """
                         UPDATE entra_config
-                        SET tenant_id = ?, client_id = ?, registration_token = ?, enabled = ?, updated_at = CURRENT_TIMESTAMP
+                        SET tenant_id = ?, client_id = ?, registration_token = ?, enabled = ?, updated_at = CURRENT_TIMESTAMP, version = version + 1
                         WHERE id = 1
                         """,
                         (tenant_id, client_id, registration_token, int(enabled)),
@@ -527,6 +1584,45 @@ def create_app():
 
         return render_template("admin_entra.html", config=current)
 
+    @app.route("/admin/status")
+    def admin_status():
+        """Operational counters for this worker process, as JSON."""
+        if g.user is None:
+            return redirect(url_for("login"))
+        if not is_admin_user(g.user):
+            return jsonify({"error": "admin privileges required"}), 403
+
+        return jsonify(
+            {
+                "storage": storage.name,
+                "db_pool": db_pool.stats(),
+                "admin_cache": admin_cache.stats(),
+                "api_auth_cache": api_auth_cache.stats(),
+                "month_grid_cache": month_grid_cache.stats(),
+                "user_color_cache": color_for_username.cache_info()._asdict(),
+                "feed_cache": feed_cache.stats(),
+                "entra_config_cache": entra_config_cache.stats(),
+                "pam": pam_runner.stats(),
+            }
+        )
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus text exposition, summed over all workers."""
+        if not metrics.enabled:
+            return Response("prometheus_client is not installed\n", status=501, mimetype="text/plain")
+        token = app.config["METRICS_TOKEN"]
+        supplied = request.headers.get("Authorization", "")
+        if not (token and secrets.compare_digest(supplied.encode(), f"Bearer {token}".encode())):
+            try:
+                client = ipaddress.ip_address(request.remote_addr or "")
+            except ValueError:
+                client = None
+            if client is None or not any(client in network for network in app.config["METRICS_ALLOW_FROM"]):
+                return Response("unauthorized\n", status=401, mimetype="text/plain")
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
+
     @app.route("/admin/users/<username>/password", methods=["GET", "POST"])
     def admin_change_user_password(username: str):
         if g.user is None:
@@ -557,9 +1653,10 @@ def create_app():
             else:
                 db.execute(
                     "UPDATE users SET password_hash = ? WHERE username = ?",
-                    (generate_password_hash(new_password), username),
+                    (hash_password(new_password), username),
                 )
                 db.commit()
+                api_auth_cache.clear()
                 flash(f"Password for user {username} has been updated.", "success")
                 return redirect(url_for("admin_users"))
 
@@ -602,9 +1699,18 @@ def create_app():
             return redirect(url_for("admin_users"))
 
         # Remove the user's bookings and then the user record.
+        booking_ranges = db.execute(
+            "SELECT start_date, end_date FROM vacations WHERE username = ?", (username,)
+        ).fetchall()
+        touch_calendar_months(
+            db, *((row["start_date"], row["end_date"]) for row in booking_ranges)
+        )
         db.execute("DELETE FROM vacations WHERE username = ?", (username,))
+        db.execute("DELETE FROM feed_tokens WHERE username = ?", (username,))
         db.execute("DELETE FROM users WHERE username = ?", (username,))
         db.commit()
+        invalidate_admin_flag(username)
+        api_auth_cache.clear()
         flash(f"User {username} and their bookings have been removed.", "success")
         return redirect(url_for("admin_users"))
 
@@ -626,23 +1732,30 @@ def create_app():
         last = next_month - timedelta(days=1)
         return first, last
 
-    def booking_slots(start_date: date, end_date: date, slot: str | None):
-        """Expand a booking into AM/PM half-day slots per calendar day.
-
-        Full-day bookings occupy both AM and PM; half-day bookings occupy
-        only the requested half on their day.
-        """
-        normalized = (slot or "").lower()
-        slots = set()
-        current = start_date
-        while current <= end_date:
-            if normalized in ("am", "pm"):
-                slots.add((current, normalized))
-            else:
-                slots.add((current, "am"))
-                slots.add((current, "pm"))
-            current += timedelta(days=1)
-        return slots
+    # Half-day slots as bit masks: a booking occupies its mask on every day
+    # of its date range, so two bookings collide only when both their date
+    # ranges and their masks intersect.
+    SLOT_MASKS = {"am": 1, "pm": 2}
+    FULL_DAY_MASK = 3
+    # slot_mask() of a stored booking, evaluated by the database.
+    SLOT_MASK_SQL = "(CASE lower(slot) WHEN 'am' THEN 1 WHEN 'pm' THEN 2 ELSE 3 END)"
+
+    def slot_mask(slot: str | None) -> int:
+        """Return the AM/PM bit mask occupied by a booking on each of its days."""
+        return SLOT_MASKS.get((slot or "").lower(), FULL_DAY_MASK)
+
+    def bookings_overlap(
+        first_start: date,
+        first_end: date,
+        first_slot: str | None,
+        second_start: date,
+        second_end: date,
+        second_slot: str | None,
+    ) -> bool:
+        """Compare two bookings as half-day intervals without expanding days."""
+        if first_start > second_end or second_start > first_end:
+            return False
+        return bool(slot_mask(first_slot) & slot_mask(second_slot))
 
     def has_booking_conflict(
         username: str,
@@ -655,23 +1768,345 @@ def create_app():
 
         Full-day bookings block both AM and PM. Half-day bookings block only
         their own half; booking the other half on the same day is allowed.
+        The date-range and slot filtering both happen in SQL, so the cost
+        does not depend on booking length or the user's booking history.
         """
         db = get_db()
-        params: list[object] = [username]
-        query = "SELECT id, start_date, end_date, slot FROM vacations WHERE username = ?"
+        params: list[object] = [username, end_date, start_date]
+        query = BOOKING_CONFLICT_QUERY
+        mask = slot_mask(slot)
+        if mask != FULL_DAY_MASK:
+            # A half-day only collides with bookings sharing one of its bits.
+            query += f" AND ({SLOT_MASK_SQL} & ?) != 0"
+            params.append(mask)
         if exclude_booking_id is not None:
             query += " AND id != ?"
             params.append(exclude_booking_id)
-        rows = db.execute(query, params).fetchall()
+        query += " LIMIT 1"
+        return db.execute(query, params).fetchone() is not None
+
+    def month_keys(start_date: date, end_date: date) -> list[str]:
+        """Return the "YYYY-MM" keys of every month a date range touches."""
+        keys = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            keys.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return keys
+
+    def touch_calendar_months(db, *date_ranges: tuple[date, date]):
+        """Bump the version of each month touched by the given date ranges.
+
+        Call inside the transaction that writes the bookings so every worker
+        sees the new version no earlier than the new data.
+        """
+        keys = set()
+        for start_date, end_date in date_ranges:
+            keys.update(month_keys(start_date, end_date))
+        db.executemany(
+            """
+            INSERT INTO calendar_month_versions (month, version, changed_at)
+            VALUES (?, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (month) DO UPDATE
+            SET version = calendar_month_versions.version + 1, changed_at = CURRENT_TIMESTAMP
+            """,
+            [(key,) for key in sorted(keys)],
+        )
 
-        new_slots = booking_slots(start_date, end_date, slot)
-        for row in rows:
-            existing_slots = booking_slots(
-                row["start_date"], row["end_date"], row["slot"]
+    def calendar_month_version(db, year: int, month: int) -> int:
+        row = db.execute(
+            "SELECT version FROM calendar_month_versions WHERE month = ?",
+            (f"{year:04d}-{month:02d}",),
+        ).fetchone()
+        return row["version"] if row else 0
+
+    def bookings_change_stamp(db, month: str | None = None):
+        """Return (version, changed_at) for one "YYYY-MM" month or all bookings.
+
+        Every insert, edit and delete bumps both through touch_calendar_months,
+        so unlike the bookings' own timestamps they also move on deletes and
+        on repeated edits within the same second.
+        """
+        query = """
+            SELECT COALESCE(SUM(version), 0) AS version, MAX(changed_at) AS changed_at
+            FROM calendar_month_versions
+        """
+        params: tuple = ()
+        if month is not None:
+            query += " WHERE month = ?"
+            params = (month,)
+        row = db.execute(query, params).fetchone()
+        changed_at = row["changed_at"]
+        if isinstance(changed_at, str):
+            # SQLite returns aggregates of TIMESTAMP columns as text.
+            changed_at = datetime.fromisoformat(changed_at)
+        if changed_at is not None:
+            changed_at = changed_at.replace(tzinfo=timezone.utc)
+        return row["version"], changed_at
+
+    def validate_booking_input(
+        start_raw: str | None,
+        end_raw: str | None,
+        mode_raw: str | None,
+        half_raw: str | None,
+    ):
+        """Validate raw booking fields shared by the HTML views and the API.
+
+        Returns (start_date, end_date, slot, errors); slot is "full", "am"
+        or "pm", and the other values are None when errors is non-empty.
+        """
+        errors = []
+        mode = (mode_raw or "full").lower()
+        half = (half_raw or "").lower()
+        slot = "full"
+        if mode == "half":
+            if half not in ("am", "pm"):
+                errors.append("Please choose AM or PM for half-day bookings.")
+            slot = half
+        start_date = end_date = None
+        if not start_raw or not end_raw:
+            errors.append("Start and end dates are required.")
+        else:
+            try:
+                start_date = parse_date(start_raw)
+                end_date = parse_date(end_raw)
+                if end_date < start_date:
+                    raise ValueError("End date before start date.")
+            except ValueError:
+                errors.append("Invalid date range.")
+        if errors:
+            return None, None, None, errors
+        return start_date, end_date, slot, errors
+
+    def insert_booking(
+        db, username: str, start_date: date, end_date: date, slot: str, comment: str | None
+    ) -> int:
+        booking_id = db.execute(
+            """
+            INSERT INTO vacations (username, start_date, end_date, comment, slot)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING id
+            """,
+            (
+                username,
+                start_date,
+                end_date,
+                (comment or "").strip() or None,
+                None if slot == "full" else slot,
+            ),
+        ).fetchone()["id"]
+        touch_calendar_months(db, (start_date, end_date))
+        db.commit()
+        return booking_id
+
+    def update_booking(
+        db, booking, start_date: date, end_date: date, slot: str, comment: str | None
+    ):
+        db.execute(
+            """
+            UPDATE vacations
+            SET start_date = ?, end_date = ?, comment = ?, slot = ?, edited_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (
+                start_date,
+                end_date,
+                (comment or "").strip() or None,
+                None if slot == "full" else slot,
+                booking["id"],
+            ),
+        )
+        touch_calendar_months(
+            db,
+            (booking["start_date"], booking["end_date"]),
+            (start_date, end_date),
+        )
+        db.commit()
+
+    def remove_booking(db, booking):
+        db.execute("DELETE FROM vacations WHERE id = ?", (booking["id"],))
+        touch_calendar_months(db, (booking["start_date"], booking["end_date"]))
+        db.commit()
+
+    def parse_booking_records(text: str, fmt: str) -> list[dict]:
+        """Parse CSV (with a header row) or JSON into booking records."""
+        if fmt == "json":
+            data = json.loads(text)
+            if isinstance(data, dict):
+                data = data.get("bookings")
+            if not isinstance(data, list):
+                raise ValueError("Expected a JSON list of bookings.")
+            return [item if isinstance(item, dict) else {} for item in data]
+        reader = csv.DictReader(io.StringIO(text), restkey="extra")
+        missing = {"username", "start_date", "end_date"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}.")
+        return list(reader)
+
+    def import_bookings(db, records: list[dict], dry_run: bool = False):
+        """Validate, conflict-check and insert a batch in one transaction.
+
+        Conflicts are checked in memory against the existing bookings in the
+        batch's date window and against earlier rows of the batch itself.
+        Returns (inserted, rejected); rejected rows carry their 1-based
+        position and the reasons.
+        """
+        rejected = []
+        candidates = []
+        for position, record in enumerate(records, start=1):
+            username = str(record.get("username") or "").strip()
+            slot_raw = str(record.get("slot") or "full").strip().lower()
+            errors = [] if username else ["Username is required."]
+            if slot_raw not in ("full", "am", "pm"):
+                errors.append('slot must be "full", "am" or "pm".')
+            start_date, end_date, slot, date_errors = validate_booking_input(
+                str(record.get("start_date") or "").strip(),
+                str(record.get("end_date") or "").strip(),
+                "full" if slot_raw == "full" else "half",
+                "" if slot_raw == "full" else slot_raw,
             )
-            if new_slots & existing_slots:
-                return True
-        return False
+            errors.extend(date_errors)
+            if errors:
+                rejected.append({"row": position, "record": record, "errors": errors})
+            else:
+                comment = str(record.get("comment") or "").strip() or None
+                candidates.append((position, record, username, start_date, end_date, slot, comment))
+
+        accepted = []
+        # Hold the write lock from the conflict check through the insert.
+        storage.begin_write(db)
+        try:
+            if candidates:
+                window_start = min(c[3] for c in candidates)
+                window_end = max(c[4] for c in candidates)
+                usernames = {c[2] for c in candidates}
+                booked: dict[str, list[tuple]] = {}
+                for row in db.execute(
+                    """
+                    SELECT username, start_date, end_date, slot FROM vacations
+                    WHERE start_date <= ? AND end_date >= ?
+                    """,
+                    (window_end, window_start),
+                ):
+                    if row["username"] in usernames:
+                        booked.setdefault(row["username"], []).append(
+                            (row["start_date"], row["end_date"], row["slot"])
+                        )
+                for position, record, username, start_date, end_date, slot, comment in candidates:
+                    existing = booked.setdefault(username, [])
+                    if any(
+                        bookings_overlap(start_date, end_date, slot, *other)
+                        for other in existing
+                    ):
+                        rejected.append(
+                            {
+                                "row": position,
+                                "record": record,
+                                "errors": ["Overlaps an existing booking for this user."],
+                            }
+                        )
+                        continue
+                    existing.append((start_date, end_date, slot))
+                    accepted.append(
+                        (username, start_date, end_date, comment, None if slot == "full" else slot)
+                    )
+
+            if accepted and not dry_run:
+                db.executemany(
+                    """
+                    INSERT INTO vacations (username, start_date, end_date, comment, slot)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    accepted,
+                )
+                touch_calendar_months(db, *((row[1], row[2]) for row in accepted))
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        rejected.sort(key=lambda item: item["row"])
+        return len(accepted), rejected
+
+    @app.cli.command("import-bookings")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option(
+        "--format",
+        "fmt",
+        type=click.Choice(["csv", "json"]),
+        help="Input format (default: from the file extension).",
+    )
+    @click.option("--dry-run", is_flag=True, help="Validate only; do not insert.")
+    def import_bookings_command(path: str, fmt: str | None, dry_run: bool):
+        """Bulk-import bookings from a CSV or JSON file."""
+        fmt = fmt or ("json" if path.lower().endswith(".json") else "csv")
+        with open(path, encoding="utf-8-sig") as handle:
+            try:
+                records = parse_booking_records(handle.read(), fmt)
+            except ValueError as exc:
+                raise click.ClickException(str(exc))
+        inserted, rejected = import_bookings(get_db(), records, dry_run=dry_run)
+        for item in rejected:
+            print(f"Row {item['row']} rejected: {' '.join(item['errors'])}")
+        verb = "Would import" if dry_run else "Imported"
+        print(f"{verb} {inserted} booking(s); rejected {len(rejected)}.")
+
+    # Rendered month grids shared by everyone viewing the same month.
+    month_grid_cache = VersionedCache(
+        max_entries=48, on_lookup=metrics.cache_recorder("month_grid")
+    )
+
+    def build_month_grid(db, first_day: date, last_day: date) -> dict:
+        """Load a month's bookings and lay them out as Monday-first weeks."""
+        rows = db.execute(CALENDAR_MONTH_QUERY, (last_day, first_day)).fetchall()
+
+        # Build a mapping of day -> list of vacation entries (username + optional comment)
+        days = {}
+        cursor = first_day
+        while cursor <= last_day:
+            days[cursor] = []
+            cursor += timedelta(days=1)
+
+        for row in rows:
+            slot = (row["slot"] or "").lower()
+            start = row["start_date"]
+            end = row["end_date"]
+            current = max(start, first_day)
+            last = min(end, last_day)
+            while current <= last:
+                days.setdefault(current, []).append(
+                    {
+                        "username": row["username"],
+                        "comment": row["comment"],
+                        "slot": slot if slot in ("am", "pm") else "full",
+                    }
+                )
+                current += timedelta(days=1)
+
+        # Group days into weeks starting on Monday
+        calendar_weeks = []
+        week = [None] * 7
+        start_weekday = first_day.weekday()  # Monday=0
+        cursor = first_day
+        i = start_weekday
+        while cursor <= last_day:
+            week[i] = {
+                "date": cursor,
+                "vacation_users": days.get(cursor, []),
+            }
+            if i == 6:
+                calendar_weeks.append(week)
+                week = [None] * 7
+                i = 0
+            else:
+                i += 1
+            cursor += timedelta(days=1)
+        if any(day is not None for day in week):
+            calendar_weeks.append(week)
+
+        return {"rows": rows, "calendar_weeks": calendar_weeks}
 
     @app.route("/", methods=["GET"])
     def index():
@@ -724,146 +2159,56 @@ def create_app():
             if is_admin:
                 form_booking_username = request.form.get("booking_username", "").strip()
 
-            validation_failed = False
-
-            if mode == "half":
-                if half_raw not in ("am", "pm"):
-                    flash("Please choose AM or PM for half-day bookings.", "error")
-                    validation_failed = True
-                    slot = None
-                else:
-                    slot = half_raw
-            else:
-                slot = "full"
-
-            if not start_raw or not end_raw:
-                flash("Start and end dates are required.", "error")
-                validation_failed = True
-            else:
-                try:
-                    start_date = parse_date(start_raw)
-                    end_date = parse_date(end_raw)
-                    if end_date < start_date:
-                        raise ValueError("End date before start date.")
-                except ValueError:
-                    flash("Invalid date range.", "error")
-                    validation_failed = True
+            start_date, end_date, slot, errors = validate_booking_input(
+                start_raw, end_raw, mode, half_raw
+            )
+            for error in errors:
+                flash(error, "error")
+            if not errors:
+                # Determine which username to use for the booking.
+                booking_username = g.user
+                if is_admin:
+                    other_user = request.form.get("booking_username", "").strip()
+                    if other_user:
+                        booking_username = other_user
+
+                # Prevent overlapping bookings (including half-days) for the same user.
+                if has_booking_conflict(booking_username, start_date, end_date, slot):
+                    flash(
+                        "You already have a vacation overlapping that date range.",
+                        "error",
+                    )
                 else:
-                    if slot is not None:
-                        # Determine which username to use for the booking.
-                        booking_username = g.user
-                        if is_admin:
-                            other_user = request.form.get("booking_username", "").strip()
-                            if other_user:
-                                booking_username = other_user
-
-                        # Prevent overlapping bookings (including half-days) for the same user.
-                        if has_booking_conflict(
-                            booking_username, start_date, end_date, slot
-                        ):
-                            flash(
-                                "You already have a vacation overlapping that date range.",
-                                "error",
-                            )
-                            validation_failed = True
-                        else:
-                            db.execute(
-                                """
-                                INSERT INTO vacations (username, start_date, end_date, comment, slot)
-                                VALUES (?, ?, ?, ?, ?)
-                                """,
-                                (
-                                    booking_username,
-                                    start_date,
-                                    end_date,
-                                    comment_raw.strip() or None,
-                                    None if slot == "full" else slot,
-                                ),
-                            )
-                            db.commit()
-                            flash("Vacation booked.", "success")
-                            return redirect(
-                                url_for(
-                                    "calendar_view",
-                                    year=year,
-                                    month=month,
-                                )
-                            )
+                    insert_booking(
+                        db, booking_username, start_date, end_date, slot, comment_raw
+                    )
+                    flash("Vacation booked.", "success")
+                    return redirect(
+                        url_for(
+                            "calendar_view",
+                            year=year,
+                            month=month,
+                        )
+                    )
 
         db = get_db()
-        init_db()
-        rows = db.execute(
-            """
-            SELECT id, username, start_date, end_date, comment, slot
-            FROM vacations
-            WHERE (start_date <= ? AND end_date >= ?)
-            ORDER BY start_date, username
-            """,
-            (last_day, first_day),
-        ).fetchall()
-
-        # Assign a stable color per user, consistent across months, using HSL from a hash.
-        usernames = {row["username"] for row in rows}
-
-        def color_for_username(username: str) -> str:
-            digest = hashlib.sha256(username.encode("utf-8")).digest()
-            hue = (digest[0] / 255.0) * 360.0
-            saturation = 55 + (digest[1] % 30)  # 55–84%
-            lightness = 40 + (digest[2] % 20)   # 40–59%
-            return f"hsl({hue:.0f}, {saturation}%, {lightness}%)"
+        # Read the version before the rows: a concurrent write can then only
+        # make the cached grid newer than its stamp, never older.
+        version = calendar_month_version(db, year, month)
+        grid = month_grid_cache.get((year, month), version)
+        if grid is None:
+            grid = build_month_grid(db, first_day, last_day)
+            month_grid_cache.set((year, month), version, grid)
+        rows = grid["rows"]
+        calendar_weeks = grid["calendar_weeks"]
 
         user_colors = {
-            username: color_for_username(username)
-            for username in usernames
+            row["username"]: color_for_username(row["username"]) for row in rows
         }
 
-        # Build a mapping of day -> list of vacation entries (username + optional comment)
-        days = {}
-        cursor = first_day
-        while cursor <= last_day:
-            days[cursor] = []
-            cursor += timedelta(days=1)
-
-        for row in rows:
-            slot = (row["slot"] or "").lower()
-            start = row["start_date"]
-            end = row["end_date"]
-            current = max(start, first_day)
-            last = min(end, last_day)
-            while current <= last:
-                days.setdefault(current, []).append(
-                    {
-                        "username": row["username"],
-                        "comment": row["comment"],
-                        "slot": slot if slot in ("am", "pm") else "full",
-                    }
-                )
-                current += timedelta(days=1)
-
         user_bookings = [row for row in rows if row["username"] == g.user]
         all_bookings = rows if is_admin else []
 
-        # Group days into weeks starting on Monday
-        calendar_weeks = []
-        week = [None] * 7
-        start_weekday = first_day.weekday()  # Monday=0
-        cursor = first_day
-        i = start_weekday
-        while cursor <= last_day:
-            week[i] = {
-                "date": cursor,
-                "vacation_users": days.get(cursor, []),
-            }
-            if i == 6:
-                calendar_weeks.append(week)
-                week = [None] * 7
-                i = 0
-            else:
-                i += 1
-            cursor += timedelta(days=1)
-        if any(day is not None for day in week):
-            calendar_weeks.append(week)
-
         # Previous/next month navigation
         if month == 1:
             prev_year, prev_month = year - 1, 12
@@ -912,7 +2257,8 @@ def create_app():
         db = get_db()
         is_admin = is_admin_user(g.user)
         booking = db.execute(
-            "SELECT id, username FROM vacations WHERE id = ?", (booking_id,)
+            "SELECT id, username, start_date, end_date FROM vacations WHERE id = ?",
+            (booking_id,),
         ).fetchone()
 
         if booking is None:
@@ -920,8 +2266,7 @@ def create_app():
         elif booking["username"] != g.user and not is_admin:
             flash("You can only delete your own bookings.", "error")
         else:
-            db.execute("DELETE FROM vacations WHERE id = ?", (booking_id,))
-            db.commit()
+            remove_booking(db, booking)
             flash("Booking removed.", "success")
 
         return redirect(
@@ -962,55 +2307,28 @@ def create_app():
             comment_raw = request.form.get("comment", "")
             mode_raw = request.form.get("slot_mode", "full")
             half_raw = request.form.get("slot_half", "").lower()
-            mode = (mode_raw or "full").lower()
-            if mode == "half":
-                if half_raw not in ("am", "pm"):
-                    flash("Please choose AM or PM for half-day bookings.", "error")
-                    return redirect(url_for("calendar_view"))
-                slot = half_raw
-            else:
-                slot = "full"
-            if not start_raw or not end_raw:
-                flash("Start and end dates are required.", "error")
-            else:
-                try:
-                    start_date = parse_date(start_raw)
-                    end_date = parse_date(end_raw)
-                    if end_date < start_date:
-                        raise ValueError("End date before start date.")
-                except ValueError:
-                    flash("Invalid date range.", "error")
+            start_date, end_date, slot, errors = validate_booking_input(
+                start_raw, end_raw, mode_raw, half_raw
+            )
+            for error in errors:
+                flash(error, "error")
+            if not errors:
+                # Prevent overlapping bookings for the same user, excluding this booking.
+                if has_booking_conflict(
+                    booking["username"],
+                    start_date,
+                    end_date,
+                    slot,
+                    exclude_booking_id=booking_id,
+                ):
+                    flash(
+                        "This user already has a vacation overlapping that date range.",
+                        "error",
+                    )
                 else:
-                    # Prevent overlapping bookings for the same user, excluding this booking.
-                    if has_booking_conflict(
-                        booking["username"],
-                        start_date,
-                        end_date,
-                        slot,
-                        exclude_booking_id=booking_id,
-                    ):
-                        flash(
-                            "This user already has a vacation overlapping that date range.",
-                            "error",
-                        )
-                    else:
-                        db.execute(
-                            """
-                            UPDATE vacations
-                            SET start_date = ?, end_date = ?, comment = ?, slot = ?, edited_at = CURRENT_TIMESTAMP
-                            WHERE id = ?
-                            """,
-                            (
-                                start_date,
-                                end_date,
-                                comment_raw.strip() or None,
-                                None if slot == "full" else slot,
-                                booking_id,
-                            ),
-                        )
-                        db.commit()
-                        flash("Booking updated.", "success")
-                        return redirect(url_for("calendar_view"))
+                    update_booking(db, booking, start_date, end_date, slot, comment_raw)
+                    flash("Booking updated.", "success")
+                    return redirect(url_for("calendar_view"))
 
         return render_template("edit_booking.html", booking=booking)
 
@@ -1022,26 +2340,546 @@ def create_app():
         db = get_db()
         is_admin = is_admin_user(g.user)
 
+        # Non-admins only ever see their own bookings.
+        filter_user = request.args.get("user", "").strip() if is_admin else g.user
+        date_from_raw = request.args.get("from", "").strip()
+        date_to_raw = request.args.get("to", "").strip()
+        try:
+            date_from = parse_date(date_from_raw) if date_from_raw else None
+            date_to = parse_date(date_to_raw) if date_to_raw else None
+        except ValueError:
+            flash("Invalid date filter.", "error")
+            date_from = date_to = None
+            date_from_raw = date_to_raw = ""
+
+        before = None
+        before_raw = request.args.get("before", "")
+        if before_raw:
+            try:
+                before_date, before_id = before_raw.split("_", 1)
+                before = (parse_date(before_date), int(before_id))
+            except ValueError:
+                before_raw = ""
+
+        page_size = app.config["OVERVIEW_PAGE_SIZE"]
+        query, params = overview_query(
+            filter_user, date_from, date_to, before, page_size + 1
+        )
+        rows = db.execute(query, params).fetchall()
+
+        filters = {"from": date_from_raw, "to": date_to_raw}
         if is_admin:
+            filters["user"] = filter_user
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = f"{last['start_date'].isoformat()}_{last['id']}"
+
+        return render_template(
+            "overview.html",
+            bookings=rows,
+            is_admin=is_admin,
+            filters=filters,
+            next_cursor=next_cursor,
+            is_first_page=not before_raw,
+        )
+
+    # Versioned JSON API for dashboards and bots; it shares validation,
+    # conflict checks and cache invalidation with the HTML views.
+    API_BOOKING_QUERY = """
+        SELECT id, username, start_date, end_date, created_at, edited_at, comment, slot
+        FROM vacations
+    """
+
+    def api_error(status: int, *messages: str):
+        response = jsonify({"errors": list(messages)})
+        response.status_code = status
+        if status == 401:
+            response.headers["WWW-Authenticate"] = 'Basic realm="vacation-tracker"'
+        return response
+
+    def api_username() -> str | None:
+        """Return the API caller from the session or HTTP Basic credentials.
+
+        Pollers send the same credentials every few seconds; successful checks
+        are cached for API_AUTH_CACHE_TTL so a conditional GET does not pay for
+        a password hash or take a PAM slot each time.
+        """
+        if g.user is not None:
+            return g.user
+        auth = request.authorization
+        if auth is None or auth.type != "basic" or not auth.username or not auth.password:
+            return None
+        backend = active_auth_backend()
+        key = hmac.new(
+            api_auth_cache_key,
+            f"{backend}\0{auth.username}\0{auth.password}".encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+        def verify():
+            if backend == "internal":
+                return authenticate_internal(auth.username, auth.password)
+            return authenticate_with_pam(auth.username, auth.password)
+
+        ok = api_auth_cache.get_or_set(key, verify)
+        if not ok:
+            # Only successes are cached; wrong passwords are re-checked.
+            api_auth_cache.invalidate(key)
+        return auth.username if ok else None
+
+    def booking_to_dict(row) -> dict:
+        slot = (row["slot"] or "").lower()
+        return {
+            "id": row["id"],
+            "username": row["username"],
+            "start_date": row["start_date"].isoformat(),
+            "end_date": row["end_date"].isoformat(),
+            "slot": slot if slot in ("am", "pm") else "full",
+            "comment": row["comment"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "edited_at": row["edited_at"].isoformat() if row["edited_at"] else None,
+        }
+
+    def conditional_bookings_response(where: str, params: list[object], build, month=None):
+        """Serve a booking list with ETag/Last-Modified validators.
+
+        The validators come from the change counters of the month being
+        listed (or of all bookings), so unchanged collections are answered
+        with 304 before loading them. Last-Modified has one-second
+        resolution; the ETag changes on every write.
+        """
+        db = get_db()
+        version, last_modified = bookings_change_stamp(db, month)
+        etag = hashlib.sha256(
+            f"{month or '*'}@{version}|{last_modified}".encode("utf-8")
+        ).hexdigest()[:32]
+
+        if not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified
+        ):
+            response = app.response_class(status=304)
+        else:
             rows = db.execute(
-                """
-                SELECT id, username, start_date, end_date, created_at, edited_at, comment, slot
-                FROM vacations
-                ORDER BY start_date DESC, username
-                """
+                f"{API_BOOKING_QUERY} WHERE {where} ORDER BY start_date, id", params
             ).fetchall()
+            response = jsonify(build([booking_to_dict(row) for row in rows]))
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Clients may cache but must revalidate, since bookings change.
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    def api_string_field_errors(payload: dict, *fields: str) -> list[str]:
+        """Reject JSON values of the wrong type before they reach the parsers."""
+        return [
+            f"{field} must be a string."
+            for field in fields
+            if payload.get(field) is not None and not isinstance(payload[field], str)
+        ]
+
+    def api_booking_fields(payload: dict, defaults=None):
+        """Translate an API payload into validate_booking_input arguments."""
+        errors = api_string_field_errors(payload, "start_date", "end_date", "slot", "comment")
+        if errors:
+            return None, None, None, errors
+        defaults = defaults or {}
+        slot = str(payload.get("slot", defaults.get("slot", "full")) or "full").lower()
+        if slot not in ("full", "am", "pm"):
+            return None, None, None, ['slot must be "full", "am" or "pm".']
+        return validate_booking_input(
+            payload.get("start_date", defaults.get("start_date")),
+            payload.get("end_date", defaults.get("end_date")),
+            "full" if slot == "full" else "half",
+            "" if slot == "full" else slot,
+        )
+
+    @app.route("/api/v1/bookings", methods=["GET"])
+    def api_list_month():
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+
+        today = date.today()
+        try:
+            year = int(request.args.get("year", today.year))
+            month = int(request.args.get("month", today.month))
+            first_day, last_day = month_bounds(year, month)
+        except ValueError:
+            return api_error(400, "Invalid year or month.")
+
+        return conditional_bookings_response(
+            "start_date <= ? AND end_date >= ?",
+            [last_day, first_day],
+            lambda bookings: {"year": year, "month": month, "bookings": bookings},
+            month=f"{year:04d}-{month:02d}",
+        )
+
+    @app.route("/api/v1/users/<path:booking_user>/bookings", methods=["GET"])
+    def api_list_user(booking_user: str):
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+
+        where = "username = ?"
+        params: list[object] = [booking_user]
+        try:
+            if request.args.get("from"):
+                where += " AND end_date >= ?"
+                params.append(parse_date(request.args["from"]))
+            if request.args.get("to"):
+                where += " AND start_date <= ?"
+                params.append(parse_date(request.args["to"]))
+        except ValueError:
+            return api_error(400, "Invalid date filter.")
+
+        return conditional_bookings_response(
+            where,
+            params,
+            lambda bookings: {"username": booking_user, "bookings": bookings},
+        )
+
+    @app.route("/api/v1/bookings", methods=["POST"])
+    def api_create_booking():
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return api_error(400, "Expected a JSON object.")
+        errors = api_string_field_errors(payload, "username")
+        if errors:
+            return api_error(400, *errors)
+        booking_username = (payload.get("username") or "").strip() or username
+        if booking_username != username and not is_admin_user(username):
+            return api_error(403, "Only admins can book for other users.")
+
+        start_date, end_date, slot, errors = api_booking_fields(payload)
+        if errors:
+            return api_error(400, *errors)
+        if has_booking_conflict(booking_username, start_date, end_date, slot):
+            return api_error(409, "This user already has a vacation overlapping that date range.")
+
+        db = get_db()
+        booking_id = insert_booking(
+            db, booking_username, start_date, end_date, slot, payload.get("comment")
+        )
+        row = db.execute(f"{API_BOOKING_QUERY} WHERE id = ?", (booking_id,)).fetchone()
+        response = jsonify(booking_to_dict(row))
+        response.status_code = 201
+        return response
+
+    def api_owned_booking(booking_id: int, username: str):
+        """Load a booking the caller may modify, or return an error response."""
+        row = get_db().execute(f"{API_BOOKING_QUERY} WHERE id = ?", (booking_id,)).fetchone()
+        if row is None:
+            return None, api_error(404, "Booking not found.")
+        if row["username"] != username and not is_admin_user(username):
+            return None, api_error(403, "You can only change your own bookings.")
+        return row, None
+
+    @app.route("/api/v1/bookings/<int:booking_id>", methods=["PATCH"])
+    def api_edit_booking(booking_id: int):
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+        booking, error = api_owned_booking(booking_id, username)
+        if error is not None:
+            return error
+
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return api_error(400, "Expected a JSON object.")
+        current = booking_to_dict(booking)
+        start_date, end_date, slot, errors = api_booking_fields(payload, defaults=current)
+        if errors:
+            return api_error(400, *errors)
+        if has_booking_conflict(
+            booking["username"], start_date, end_date, slot, exclude_booking_id=booking_id
+        ):
+            return api_error(409, "This user already has a vacation overlapping that date range.")
+
+        db = get_db()
+        update_booking(
+            db, booking, start_date, end_date, slot, payload.get("comment", current["comment"])
+        )
+        row = db.execute(f"{API_BOOKING_QUERY} WHERE id = ?", (booking_id,)).fetchone()
+        return jsonify(booking_to_dict(row))
+
+    @app.route("/api/v1/bookings/<int:booking_id>", methods=["DELETE"])
+    def api_delete_booking(booking_id: int):
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+        booking, error = api_owned_booking(booking_id, username)
+        if error is not None:
+            return error
+
+        remove_booking(get_db(), booking)
+        return app.response_class(status=204)
+
+    @app.route("/api/v1/bookings/import", methods=["POST"])
+    def api_import_bookings():
+        """Admin bulk import; accepts a JSON list or a CSV body."""
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+        if not is_admin_user(username):
+            return api_error(403, "Admin privileges required.")
+
+        upload = request.files.get("file")
+        if upload is not None:
+            data = upload.read()
+            fmt = "json" if (upload.filename or "").lower().endswith(".json") else "csv"
         else:
-            rows = db.execute(
+            data = request.get_data()
+            fmt = "json" if request.is_json else "csv"
+        try:
+            # utf-8-sig drops the BOM that Excel puts in front of CSV exports.
+            text = data.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            return api_error(400, "Upload must be UTF-8 text.")
+        try:
+            records = parse_booking_records(text, fmt)
+        except ValueError as exc:
+            return api_error(400, str(exc))
+
+        dry_run = request.args.get("dry_run", "").lower() in ("1", "true", "yes")
+        inserted, rejected = import_bookings(get_db(), records, dry_run=dry_run)
+        return jsonify(
+            {"inserted": inserted, "rejected": rejected, "dry_run": dry_run}
+        )
+
+    def booking_ics_event(row) -> str:
+        """Render one booking as a VEVENT.
+
+        Full days become all-day events; half-day bookings become timed
+        events on the first day that repeat daily until the end date.
+        """
+        slot = (row["slot"] or "").lower()
+        label = {"am": " (AM)", "pm": " (PM)"}.get(slot, "")
+        changed = row["edited_at"] or row["created_at"] or datetime.now(timezone.utc)
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:vacation-{row['id']}@{app.config['ICS_UID_DOMAIN']}",
+            f"DTSTAMP:{changed.strftime('%Y%m%dT%H%M%SZ')}",
+            f"SUMMARY:{ics_escape(row['username'] + ' – vacation' + label)}",
+        ]
+        if slot in app.config["ICS_HALF_DAY_HOURS"]:
+            start_time, end_time = app.config["ICS_HALF_DAY_HOURS"][slot]
+            first = row["start_date"].strftime("%Y%m%d")
+            lines.append(f"DTSTART:{first}T{start_time}")
+            lines.append(f"DTEND:{first}T{end_time}")
+            if row["end_date"] > row["start_date"]:
+                until = row["end_date"].strftime("%Y%m%d")
+                lines.append(f"RRULE:FREQ=DAILY;UNTIL={until}T{end_time}")
+        else:
+            lines.append(f"DTSTART;VALUE=DATE:{row['start_date'].strftime('%Y%m%d')}")
+            end_exclusive = row["end_date"] + timedelta(days=1)
+            lines.append(f"DTEND;VALUE=DATE:{end_exclusive.strftime('%Y%m%d')}")
+            lines.append("TRANSP:OPAQUE")
+        if row["comment"]:
+            lines.append(f"DESCRIPTION:{ics_escape(row['comment'])}")
+        lines.append("END:VEVENT")
+        return "".join(ics_fold(line) for line in lines)
+
+    def ics_header(name: str) -> str:
+        return "".join(
+            ics_fold(line)
+            for line in (
+                "BEGIN:VCALENDAR",
+                "VERSION:2.0",
+                "PRODID:-//Devops-KT//Vacation Tracker//EN",
+                "CALSCALE:GREGORIAN",
+                "METHOD:PUBLISH",
+                f"X-WR-CALNAME:{ics_escape(name)}",
+            )
+        )
+
+    ICS_FOOTER = ics_fold("END:VCALENDAR")
+
+    def stream_bookings(query: str, params: list[object], render_row, header="", footer=""):
+        """Yield an export chunk by chunk straight from the SQLite cursor.
+
+        The generator borrows its own pooled connection, because the
+        request's connection is returned at teardown before streaming ends.
+        """
+        def generate():
+            db = db_pool.acquire()
+            try:
+                if header:
+                    yield header
+                buffer = []
+                for row in storage.stream(db, query, params):
+                    buffer.append(render_row(row))
+                    if len(buffer) >= 500:
+                        yield "".join(buffer)
+                        buffer = []
+                if buffer:
+                    yield "".join(buffer)
+                if footer:
+                    yield footer
+            finally:
+                db_pool.release(db)
+
+        return generate()
+
+    def export_filters(username: str):
+        """Build the WHERE clause for an export from the query string."""
+        clauses = []
+        params: list[object] = []
+        filter_user = request.args.get("user", "").strip()
+        if not is_admin_user(username):
+            filter_user = username
+        if filter_user:
+            clauses.append("username = ?")
+            params.append(filter_user)
+        if request.args.get("from"):
+            clauses.append("end_date >= ?")
+            params.append(parse_date(request.args["from"]))
+        if request.args.get("to"):
+            clauses.append("start_date <= ?")
+            params.append(parse_date(request.args["to"]))
+        query = API_BOOKING_QUERY
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return query + " ORDER BY start_date, id", params
+
+    @app.route("/export/bookings.csv")
+    def export_csv():
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+        try:
+            query, params = export_filters(username)
+        except ValueError:
+            return api_error(400, "Invalid date filter.")
+
+        fields = ["id", "username", "start_date", "end_date", "slot", "comment", "created_at", "edited_at"]
+
+        def render_row(row) -> str:
+            out = io.StringIO()
+            record = booking_to_dict(row)
+            csv.writer(out).writerow([csv_escape(record[field] or "") for field in fields])
+            return out.getvalue()
+
+        header_out = io.StringIO()
+        csv.writer(header_out).writerow(fields)
+        return Response(
+            stream_bookings(query, params, render_row, header=header_out.getvalue()),
+            mimetype="text/csv",
+            headers={"Content-Disposition": "attachment; filename=bookings.csv"},
+        )
+
+    @app.route("/export/bookings.ics")
+    def export_ics():
+        username = api_username()
+        if username is None:
+            return api_error(401, "Authentication required.")
+        try:
+            query, params = export_filters(username)
+        except ValueError:
+            return api_error(400, "Invalid date filter.")
+
+        return Response(
+            stream_bookings(
+                query,
+                params,
+                booking_ics_event,
+                header=ics_header("Vacations"),
+                footer=ICS_FOOTER,
+            ),
+            mimetype="text/calendar",
+            headers={"Content-Disposition": "attachment; filename=bookings.ics"},
+        )
+
+    # Pre-rendered subscription feeds; calendar clients poll these often.
+    feed_cache = VersionedCache(max_entries=256, on_lookup=metrics.cache_recorder("feed"))
+
+    def render_feed(db, feed_user: str | None) -> tuple[bytes, str]:
+        since = date.today() - timedelta(days=app.config["FEED_HISTORY_DAYS"])
+        query = API_BOOKING_QUERY + " WHERE end_date >= ?"
+        params: list[object] = [since]
+        if feed_user:
+            query += " AND username = ?"
+            params.append(feed_user)
+        query += " ORDER BY start_date, id"
+        name = f"Vacations – {feed_user}" if feed_user else "Team vacations"
+        parts = [ics_header(name)]
+        parts.extend(booking_ics_event(row) for row in db.execute(query, params))
+        parts.append(ICS_FOOTER)
+        body = "".join(parts).encode("utf-8")
+        return body, hashlib.sha256(body).hexdigest()
+
+    @app.route("/feeds/<token>/<scope>.ics")
+    def subscription_feed(token: str, scope: str):
+        """Token-authenticated iCalendar feed for calendar subscriptions.
+
+        `scope` is "team" for everyone's bookings or "mine" for the token
+        owner's. The body is rebuilt only when a booking changed.
+        """
+        if scope not in ("team", "mine"):
+            return api_error(404, "Unknown feed.")
+        db = get_db()
+        owner = db.execute(
+            "SELECT username FROM feed_tokens WHERE token = ?", (token,)
+        ).fetchone()
+        if owner is None:
+            return api_error(404, "Unknown feed.")
+
+        feed_user = owner["username"] if scope == "mine" else None
+        # The history window moves daily, so the day is part of the version.
+        version = (bookings_change_stamp(db)[0], date.today())
+        cached = feed_cache.get(feed_user, version)
+        if cached is None:
+            cached = render_feed(db, feed_user)
+            feed_cache.set(feed_user, version, cached)
+        body, etag = cached
+
+        if not is_resource_modified(request.environ, etag=etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(body, mimetype="text/calendar")
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    @app.route("/feeds", methods=["GET", "POST"])
+    def feeds():
+        if g.user is None:
+            return redirect(url_for("login"))
+
+        db = get_db()
+        if request.method == "POST":
+            # Issue a new token; any previously shared URLs stop working.
+            db.execute(
                 """
-                SELECT id, username, start_date, end_date, created_at, edited_at, comment, slot
-                FROM vacations
-                WHERE username = ?
-                ORDER BY start_date DESC
+                INSERT INTO feed_tokens (username, token) VALUES (?, ?)
+                ON CONFLICT (username) DO UPDATE
+                SET token = excluded.token, created_at = CURRENT_TIMESTAMP
                 """,
-                (g.user,),
-            ).fetchall()
+                (g.user, secrets.token_urlsafe(32)),
+            )
+            db.commit()
+            flash("A new subscription link has been created.", "success")
+            return redirect(url_for("feeds"))
 
-        return render_template("overview.html", bookings=rows, is_admin=is_admin)
+        row = db.execute(
+            "SELECT token FROM feed_tokens WHERE username = ?", (g.user,)
+        ).fetchone()
+        urls = None
+        if row is not None:
+            urls = {
+                scope: url_for(
+                    "subscription_feed", token=row["token"], scope=scope, _external=True
+                )
+                for scope in ("team", "mine")
+            }
+        return render_template("feeds.html", urls=urls)
 
     return app
 
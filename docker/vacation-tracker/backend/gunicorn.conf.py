@@ -0,0 +1,29 @@
+"""Gunicorn settings, loaded automatically when gunicorn starts in this directory."""
+
+import os
+import shutil
+
+# Threaded workers by default: a request waiting on Entra (SSO callback) or PAM
+# holds one thread, while the worker's other threads keep serving the calendar.
+# Set GUNICORN_WORKER_CLASS=sync for the old one-request-per-worker model, or
+# gevent (after `pip install gevent`) for many concurrent SSO logins.
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# gunicorn silently turns sync workers into gthread ones when threads > 1.
+threads = int(os.environ.get("GUNICORN_THREADS", "1" if worker_class == "sync" else "8"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+
+
+def on_starting(server):
+    # Samples left over from a previous run would otherwise be summed into /metrics.
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
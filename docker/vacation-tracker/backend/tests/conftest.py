@@ -0,0 +1,99 @@
+"""Shared fixtures: a fresh app per test on SQLite and, optionally, PostgreSQL.
+
+PostgreSQL runs are skipped unless VACATION_TEST_DATABASE_URL points at a
+database the tests may wipe, e.g.
+
+    VACATION_TEST_DATABASE_URL=postgresql://localhost/vacation_test pytest
+"""
+
+import base64
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+TEST_DATABASE_URL = os.environ.get("VACATION_TEST_DATABASE_URL", "")
+ADMIN = ("admin", "admin-password")
+
+
+def reset_postgres(url: str):
+    import psycopg
+
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute("DROP SCHEMA IF EXISTS public CASCADE")
+        conn.execute("CREATE SCHEMA public")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def backend(request):
+    if request.param == "postgresql":
+        if not TEST_DATABASE_URL:
+            pytest.skip("VACATION_TEST_DATABASE_URL is not set")
+        if app_module.psycopg is None:
+            pytest.skip("psycopg is not installed")
+        reset_postgres(TEST_DATABASE_URL)
+    return request.param
+
+
+@pytest.fixture
+def app_env(backend, tmp_path, monkeypatch):
+    """Point create_app at an empty database of the backend under test."""
+    monkeypatch.setenv("AUTH_BACKEND", "internal")
+    monkeypatch.setenv("ADMIN_USERS", ADMIN[0])
+    monkeypatch.setenv("VACATION_DB_PATH", str(tmp_path / "vacations.db"))
+    # Hashing cost is not under test; keep registrations and logins fast.
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    monkeypatch.delenv("METRICS_ALLOW_FROM", raising=False)
+    if backend == "postgresql":
+        monkeypatch.setenv("DATABASE_URL", TEST_DATABASE_URL)
+    else:
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+
+
+def close_pool(application):
+    # Close pooled connections so PostgreSQL runs do not pile them up.
+    pool = application.extensions["db_pool"]
+    for _ in range(pool.stats()["idle"]):
+        pool.acquire().close()
+
+
+@pytest.fixture
+def app(app_env):
+    application = app_module.create_app()
+    application.config["TESTING"] = True
+    yield application
+    close_pool(application)
+
+
+def register(client, username: str, password: str):
+    response = client.post(
+        "/register",
+        data={"username": username, "password": password, "confirm_password": password},
+    )
+    assert response.status_code == 302, response.data
+
+
+@pytest.fixture
+def admin_headers(app):
+    """HTTP Basic credentials of a registered admin for the JSON API."""
+    register(app.test_client(), *ADMIN)
+    token = base64.b64encode(f"{ADMIN[0]}:{ADMIN[1]}".encode()).decode()
+    return {"Authorization": f"Basic {token}"}
+
+
+def raw_sql(app, query: str, params=()):
+    """Run one statement on a connection outside the app's request handling."""
+    conn = app.extensions["storage"].connect()
+    try:
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall() if cursor.description else None
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
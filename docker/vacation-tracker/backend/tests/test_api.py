@@ -0,0 +1,163 @@
+"""JSON bookings API: validation, conditional GET, Basic-auth caching and /metrics access."""
+
+import base64
+
+import pytest
+
+import app as app_module
+from conftest import close_pool, raw_sql
+
+BOOKING = {"start_date": "2030-03-04", "end_date": "2030-03-05", "slot": "full"}
+
+
+def create_booking(client, headers, **fields):
+    response = client.post("/api/v1/bookings", json={**BOOKING, **fields}, headers=headers)
+    assert response.status_code == 201, response.data
+    return response.get_json()
+
+
+def test_list_is_not_modified_until_a_booking_changes(app, admin_headers):
+    client = app.test_client()
+    create_booking(client, admin_headers)
+    first = client.get("/api/v1/bookings?year=2030&month=3", headers=admin_headers)
+    assert first.status_code == 200
+    assert len(first.get_json()["bookings"]) == 1
+
+    again = client.get(
+        "/api/v1/bookings?year=2030&month=3",
+        headers={**admin_headers, "If-None-Match": first.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_etag_changes_on_every_edit_within_the_same_second(app, admin_headers):
+    client = app.test_client()
+    booking = create_booking(client, admin_headers)
+    url = "/api/v1/users/admin/bookings"
+
+    client.patch(f"/api/v1/bookings/{booking['id']}", json={"end_date": "2030-03-06"}, headers=admin_headers)
+    etag = client.get(url, headers=admin_headers).headers["ETag"]
+    client.patch(f"/api/v1/bookings/{booking['id']}", json={"end_date": "2030-03-07"}, headers=admin_headers)
+
+    response = client.get(url, headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["bookings"][0]["end_date"] == "2030-03-07"
+
+
+@pytest.mark.parametrize("url", ["/api/v1/users/admin/bookings", "/api/v1/bookings?year=2030&month=3"])
+def test_deleting_the_newest_booking_moves_last_modified(app, admin_headers, url):
+    client = app.test_client()
+    create_booking(client, admin_headers)
+    newest = create_booking(client, admin_headers, start_date="2030-03-10", end_date="2030-03-10")
+    # Pretend the bookings were written long ago, so the delete below is
+    # clearly newer at Last-Modified's one-second resolution.
+    raw_sql(app, "UPDATE calendar_month_versions SET changed_at = ?", ("2020-01-01 00:00:00",))
+    last_modified = client.get(url, headers=admin_headers).headers["Last-Modified"]
+
+    client.delete(f"/api/v1/bookings/{newest['id']}", headers=admin_headers)
+
+    response = client.get(url, headers={**admin_headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert len(response.get_json()["bookings"]) == 1
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [("username", 5), ("start_date", 5), ("end_date", ["2030-03-05"]), ("slot", 1), ("comment", {"a": 1})],
+)
+def test_create_rejects_non_string_fields(app, admin_headers, field, value):
+    response = app.test_client().post(
+        "/api/v1/bookings", json={**BOOKING, field: value}, headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"errors": [f"{field} must be a string."]}
+
+
+def test_edit_rejects_non_string_fields(app, admin_headers):
+    client = app.test_client()
+    booking = create_booking(client, admin_headers)
+    response = client.patch(
+        f"/api/v1/bookings/{booking['id']}", json={"start_date": 20300304}, headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"errors": ["start_date must be a string."]}
+
+
+def count_password_checks(monkeypatch):
+    calls = []
+    real = app_module.check_password_hash
+
+    def counting(stored_hash, password):
+        calls.append(password)
+        return real(stored_hash, password)
+
+    monkeypatch.setattr(app_module, "check_password_hash", counting)
+    return calls
+
+
+def test_repeated_polls_verify_the_password_once(app, admin_headers, monkeypatch):
+    client = app.test_client()
+    checks = count_password_checks(monkeypatch)
+    etag = client.get("/api/v1/users/admin/bookings", headers=admin_headers).headers["ETag"]
+    for _ in range(3):
+        response = client.get(
+            "/api/v1/users/admin/bookings", headers={**admin_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+    assert len(checks) == 1
+
+
+def test_wrong_passwords_are_not_cached(app, admin_headers, monkeypatch):
+    client = app.test_client()
+    checks = count_password_checks(monkeypatch)
+    wrong = {"Authorization": "Basic " + base64.b64encode(b"admin:nope").decode()}
+    for _ in range(2):
+        assert client.get("/api/v1/users/admin/bookings", headers=wrong).status_code == 401
+    assert len(checks) == 2
+
+
+def test_password_change_drops_cached_credentials(app, admin_headers):
+    client = app.test_client()
+    assert client.get("/api/v1/users/admin/bookings", headers=admin_headers).status_code == 200
+
+    with client.session_transaction() as sess:
+        sess["username"] = "admin"
+        sess["auth_source"] = "internal"
+    response = client.post(
+        "/change-password",
+        data={
+            "current_password": "admin-password",
+            "new_password": "rotated-password",
+            "confirm_password": "rotated-password",
+        },
+    )
+    assert response.status_code == 302
+
+    stale = app.test_client().get("/api/v1/users/admin/bookings", headers=admin_headers)
+    assert stale.status_code == 401
+
+
+
+def test_metrics_are_closed_by_default(app):
+    assert app.test_client().get("/metrics").status_code == 401
+
+
+def test_metrics_accept_the_token(app):
+    app.config["METRICS_TOKEN"] = "scrape-me"
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert response.status_code == 200
+    assert b"vacation_tracker_requests_total" in response.data
+
+
+@pytest.mark.parametrize("allow_from, status", [("127.0.0.1", 200), ("10.0.0.0/8, ::1", 401)])
+def test_metrics_allow_configured_addresses(app_env, monkeypatch, allow_from, status):
+    monkeypatch.setenv("METRICS_ALLOW_FROM", allow_from)
+    application = app_module.create_app()
+    try:
+        response = application.test_client().get("/metrics", environ_base={"REMOTE_ADDR": "127.0.0.1"})
+        assert response.status_code == status
+    finally:
+        close_pool(application)
@@ -0,0 +1,162 @@
+"""PAM logins on the bounded runner, with a fake PAM module."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as app_module
+from app import BoundedCallRunner
+
+
+@pytest.fixture
+def backend():
+    # Nothing here touches bookings; one backend is enough.
+    return "sqlite"
+
+
+class FakePam:
+    """Stand-in for the python-pam module with injectable latency."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        # Set to make calls that are still sleeping return immediately.
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    def pam(self):
+        return self
+
+    def authenticate(self, username, password, service="login"):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.release.wait(self.latency)
+            self.reason = "Authentication failure"
+            return password == "secret"
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def fake_pam(monkeypatch):
+    fake = FakePam()
+    monkeypatch.setattr(app_module, "pam", fake)
+    yield fake
+    fake.release.set()
+
+
+@pytest.fixture
+def pam_app(app_env, monkeypatch, fake_pam):
+    monkeypatch.setenv("AUTH_BACKEND", "pam")
+    monkeypatch.setenv("PAM_TIMEOUT", "0.3")
+    monkeypatch.setenv("PAM_MAX_CONCURRENT", "2")
+    application = app_module.create_app()
+    application.config["TESTING"] = True
+    return application
+
+
+def login(application, password="secret"):
+    return application.test_client().post(
+        "/login", data={"username": "alice", "password": password}, follow_redirects=False
+    )
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached in time"
+        time.sleep(0.01)
+
+
+def test_runner_enforces_the_slot_limit():
+    runner = BoundedCallRunner(max_concurrent=2, timeout=5, name="test")
+    fake = FakePam(latency=0.05)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: runner.call(fake.authenticate, "u", "secret"), range(6)))
+    assert results == [True] * 6
+    assert fake.max_active == 2
+    stats = runner.stats()
+    assert stats["calls"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["busy"] == stats["timeouts"] == 0
+
+
+def test_runner_times_out_waiting_for_a_slot():
+    runner = BoundedCallRunner(max_concurrent=1, timeout=0.1, name="test")
+    blocker = threading.Event()
+
+    def hold_slot():
+        with pytest.raises(TimeoutError):
+            runner.call(blocker.wait, 5)
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    wait_for(lambda: runner.stats()["in_flight"] == 1)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="slots busy"):
+        runner.call(lambda: True)
+    assert time.monotonic() - started < 1
+    assert runner.stats()["busy"] == 1
+
+    blocker.set()
+    holder.join()
+
+
+def test_timed_out_call_keeps_its_slot_until_it_returns():
+    runner = BoundedCallRunner(max_concurrent=1, timeout=0.1, name="test")
+    blocker = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        runner.call(blocker.wait, 5)
+    stats = runner.stats()
+    assert stats["timeouts"] == 1
+    assert stats["in_flight"] == 1
+    with pytest.raises(TimeoutError, match="slots busy"):
+        runner.call(lambda: True)
+
+    blocker.set()
+    wait_for(lambda: runner.stats()["in_flight"] == 0)
+    assert runner.call(lambda: "done") == "done"
+
+
+def test_pam_login_succeeds_and_fails_normally(pam_app, fake_pam):
+    assert login(pam_app).status_code == 302
+    response = login(pam_app, password="wrong")
+    assert response.status_code == 200
+    assert b"Invalid username or password." in response.data
+
+
+def test_slow_pam_fails_fast(pam_app, fake_pam):
+    fake_pam.latency = 30
+    started = time.monotonic()
+    response = login(pam_app)
+    elapsed = time.monotonic() - started
+
+    assert response.status_code == 200
+    assert b"Login is temporarily unavailable" in response.data
+    assert elapsed < 2
+    assert fake_pam.active == 1  # still running, and still holding its slot
+
+    fake_pam.release.set()
+    wait_for(lambda: fake_pam.active == 0)
+    fake_pam.latency = 0
+    fake_pam.release.clear()
+    assert login(pam_app).status_code == 302
+
+
+def test_concurrent_pam_logins_are_capped(pam_app, fake_pam):
+    fake_pam.latency = 0.05
+    # Two slots and PAM_TIMEOUT=0.3s: the last two logins wait ~0.05s for a slot.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        responses = list(pool.map(lambda _: login(pam_app), range(4)))
+    assert fake_pam.max_active == 2
+    assert [response.status_code for response in responses] == [302] * 4
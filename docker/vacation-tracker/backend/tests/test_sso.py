@@ -0,0 +1,111 @@
+"""Entra SSO callbacks against the benchmark's fake Entra (HTTPS, via openssl)."""
+
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as app_module
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import benchmark  # noqa: E402
+
+TOKEN_LATENCY = 0.3
+LOGINS = 6
+
+pytestmark = [
+    pytest.mark.skipif(app_module.msal is None, reason="msal is not installed"),
+    pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl is needed for the fake Entra"),
+]
+
+
+@pytest.fixture
+def backend():
+    # enable_fake_sso writes the settings straight into the SQLite file.
+    return "sqlite"
+
+
+class CountingEntraHandler(benchmark.FakeEntraHandler):
+    """Records metadata fetches and how many token requests overlap."""
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.metadata_requests += 1
+        super().do_GET()
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        try:
+            super().do_POST()
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+
+@pytest.fixture
+def fake_entra(tmp_path):
+    server, cert = benchmark.start_fake_entra(str(tmp_path), TOKEN_LATENCY)
+    server.RequestHandlerClass = CountingEntraHandler
+    server.lock = threading.Lock()
+    server.metadata_requests = server.active = server.max_active = 0
+    yield server, cert
+    server.shutdown()
+
+
+@pytest.fixture
+def msal_clients(monkeypatch):
+    """Count MSAL clients the app constructs."""
+    created = []
+
+    class CountingClient(app_module.msal.ConfidentialClientApplication):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(app_module.msal, "ConfidentialClientApplication", CountingClient)
+    return created
+
+
+@pytest.fixture
+def sso_app(app_env, monkeypatch, fake_entra, tmp_path):
+    server, cert = fake_entra
+    monkeypatch.setenv("ENTRA_AUTHORITY_HOST", f"https://127.0.0.1:{server.server_port}")
+    # MSAL talks to Entra through requests, which honours this bundle.
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", cert)
+    application = app_module.create_app()
+    application.config["TESTING"] = True
+    benchmark.enable_fake_sso(str(tmp_path / "vacations.db"))
+    return application
+
+
+def callback(application):
+    return application.test_client().get("/auth/entra/callback?code=fake-code")
+
+
+def test_concurrent_callbacks_overlap_and_share_one_client(sso_app, fake_entra, msal_clients):
+    server, _ = fake_entra
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=LOGINS) as pool:
+        responses = list(pool.map(lambda _: callback(sso_app), range(LOGINS)))
+    elapsed = time.monotonic() - started
+
+    for response in responses:
+        assert response.status_code == 302
+        assert response.location.endswith("/calendar")
+    # The token exchanges ran side by side rather than one after another.
+    assert server.max_active > 1
+    assert elapsed < LOGINS * TOKEN_LATENCY
+    # One MSAL client, and one metadata fetch, for all of the logins.
+    assert len(msal_clients) == 1
+    assert server.metadata_requests == 1
+
+    assert callback(sso_app).status_code == 302
+    assert len(msal_clients) == 1
+    assert server.metadata_requests == 1
@@ -0,0 +1,238 @@
+"""Storage backends: migrations, bookings, imports and exports on each backend."""
+
+import csv
+import io
+import json
+import threading
+
+import pytest
+
+import app as app_module
+from conftest import close_pool, raw_sql
+
+BOOKING = {"start_date": "2030-03-04", "end_date": "2030-03-05", "slot": "full"}
+
+
+def schema_version(app):
+    conn = app.extensions["storage"].connect()
+    try:
+        return app.extensions["storage"].schema_version(conn)
+    finally:
+        conn.close()
+
+
+def test_postgres_placeholders_are_rewritten():
+    query = "SELECT * FROM users WHERE username LIKE 'a%' AND id = ? AND name = ?"
+    assert app_module.PostgresConnection._sql(query) == (
+        "SELECT * FROM users WHERE username LIKE 'a%%' AND id = %s AND name = %s"
+    )
+
+
+def test_migrations_create_the_current_schema(app):
+    version = schema_version(app)
+    assert version > 0
+    storage = app.extensions["storage"]
+    conn = storage.connect()
+    try:
+        assert {"username", "password_hash", "is_admin"} <= storage.column_names(conn, "users")
+        assert {"edited_at", "comment", "slot"} <= storage.column_names(conn, "vacations")
+        assert "changed_at" in storage.column_names(conn, "calendar_month_versions")
+        assert "version" in storage.column_names(conn, "entra_config")
+    finally:
+        conn.close()
+
+    result = app.test_cli_runner().invoke(args=["init-db"])
+    assert result.exit_code == 0
+    assert f"schema version {version}" in result.output
+    assert schema_version(app) == version
+
+
+def test_concurrent_startups_migrate_once(app_env):
+    # Several workers booting against an empty database at the same time.
+    barrier = threading.Barrier(4)
+    apps, errors = [], []
+
+    def boot():
+        barrier.wait()
+        try:
+            apps.append(app_module.create_app())
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=boot) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert errors == []
+        assert len({schema_version(application) for application in apps}) == 1
+    finally:
+        for application in apps:
+            close_pool(application)
+
+
+def test_booking_crud(app, admin_headers):
+    client = app.test_client()
+    created = client.post("/api/v1/bookings", json={**BOOKING, "comment": "ski"}, headers=admin_headers)
+    assert created.status_code == 201
+    booking = created.get_json()
+    assert booking["username"] == "admin"
+    assert booking["comment"] == "ski"
+
+    listed = client.get("/api/v1/bookings?year=2030&month=3", headers=admin_headers).get_json()
+    assert [item["id"] for item in listed["bookings"]] == [booking["id"]]
+
+    edited = client.patch(
+        f"/api/v1/bookings/{booking['id']}", json={"slot": "am", "comment": "half"}, headers=admin_headers
+    )
+    assert edited.status_code == 200
+    assert edited.get_json()["slot"] == "am"
+    assert edited.get_json()["edited_at"] is not None
+
+    assert client.delete(f"/api/v1/bookings/{booking['id']}", headers=admin_headers).status_code == 204
+    assert client.delete(f"/api/v1/bookings/{booking['id']}", headers=admin_headers).status_code == 404
+    listed = client.get("/api/v1/bookings?year=2030&month=3", headers=admin_headers).get_json()
+    assert listed["bookings"] == []
+
+
+@pytest.mark.parametrize(
+    "first, second, status",
+    [
+        ("full", "full", 409),
+        ("full", "am", 409),
+        ("am", "am", 409),
+        ("am", "pm", 201),
+        ("pm", "am", 201),
+        ("pm", "PM", 409),
+        ("pm", "full", 409),
+    ],
+)
+def test_booking_conflicts(app, admin_headers, first, second, status):
+    client = app.test_client()
+    booking = {**BOOKING, "slot": first}
+    assert client.post("/api/v1/bookings", json=booking, headers=admin_headers).status_code == 201
+    overlapping = {"start_date": "2030-03-05", "end_date": "2030-03-08", "slot": second}
+    response = client.post("/api/v1/bookings", json=overlapping, headers=admin_headers)
+    assert response.status_code == status
+
+
+def test_edit_does_not_conflict_with_itself(app, admin_headers):
+    client = app.test_client()
+    booking = client.post("/api/v1/bookings", json=BOOKING, headers=admin_headers).get_json()
+    response = client.patch(
+        f"/api/v1/bookings/{booking['id']}", json={"end_date": "2030-03-06"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+
+
+def test_import_api_checks_conflicts_in_one_batch(app, admin_headers):
+    client = app.test_client()
+    client.post("/api/v1/bookings", json=BOOKING, headers=admin_headers)
+    csv_body = (
+        "username,start_date,end_date,slot,comment\n"
+        "alice,2030-03-02,2030-03-03,am,first\n"
+        "alice,2030-03-03,2030-03-03,pm,other half\n"
+        "alice,2030-03-03,2030-03-03,am,overlaps row 1\n"
+        "admin,2030-03-05,2030-03-05,full,overlaps existing\n"
+        "bob,2030-03-09,2030-03-01,full,bad range\n"
+    )
+    headers = {**admin_headers, "Content-Type": "text/csv"}
+
+    dry_run = client.post("/api/v1/bookings/import?dry_run=1", data=csv_body, headers=headers).get_json()
+    assert dry_run["inserted"] == 2
+    assert [item["row"] for item in dry_run["rejected"]] == [3, 4, 5]
+    assert raw_sql(app, "SELECT COUNT(*) AS total FROM vacations")[0]["total"] == 1
+
+    result = client.post("/api/v1/bookings/import", data=csv_body, headers=headers).get_json()
+    assert result["inserted"] == 2
+    assert result["dry_run"] is False
+    rows = raw_sql(app, "SELECT username, slot FROM vacations WHERE username = ? ORDER BY id", ("alice",))
+    assert [row["slot"] for row in rows] == ["am", "pm"]
+
+
+def test_import_command_reads_json(app, tmp_path):
+    path = tmp_path / "bookings.json"
+    path.write_text(
+        json.dumps(
+            {
+                "bookings": [
+                    {"username": "carol", "start_date": "2030-04-01", "end_date": "2030-04-03"},
+                    {"username": "carol", "start_date": "2030-04-02", "end_date": "2030-04-02"},
+                ]
+            }
+        )
+    )
+    result = app.test_cli_runner().invoke(args=["import-bookings", str(path)])
+    assert result.exit_code == 0, result.output
+    assert "Row 2 rejected" in result.output
+    assert raw_sql(app, "SELECT COUNT(*) AS total FROM vacations")[0]["total"] == 1
+
+
+def test_exports(app, admin_headers):
+    client = app.test_client()
+    client.post("/api/v1/bookings", json={**BOOKING, "comment": "ski, trip"}, headers=admin_headers)
+    client.post(
+        "/api/v1/bookings",
+        json={"start_date": "2030-05-01", "end_date": "2030-05-02", "slot": "pm"},
+        headers=admin_headers,
+    )
+
+    csv_lines = client.get("/export/bookings.csv", headers=admin_headers).get_data(as_text=True).splitlines()
+    assert csv_lines[0] == "id,username,start_date,end_date,slot,comment,created_at,edited_at"
+    assert len(csv_lines) == 3
+    assert ',admin,2030-03-04,2030-03-05,full,"ski, trip",' in csv_lines[1]
+
+    filtered = client.get("/export/bookings.csv?from=2030-04-01", headers=admin_headers)
+    assert len(filtered.get_data(as_text=True).splitlines()) == 2
+
+    ics = client.get("/export/bookings.ics", headers=admin_headers).get_data(as_text=True)
+    assert ics.count("BEGIN:VEVENT") == 2
+    assert "DTSTART;VALUE=DATE:20300304" in ics
+    assert "DTEND;VALUE=DATE:20300306" in ics
+    assert "RRULE:FREQ=DAILY;UNTIL=20300502T170000" in ics
+
+
+@pytest.mark.parametrize("comment", ["=HYPERLINK(\"http://x\")", "+1", "-1+2", "@SUM(A1)"])
+def test_csv_export_neutralises_formulas(app, admin_headers, comment):
+    client = app.test_client()
+    client.post("/api/v1/bookings", json={**BOOKING, "comment": comment}, headers=admin_headers)
+
+    body = client.get("/export/bookings.csv", headers=admin_headers).get_data(as_text=True)
+    row = next(csv.DictReader(io.StringIO(body)))
+    assert row["comment"] == "'" + comment
+    assert row["username"] == "admin"
+
+
+
+def test_csv_escape():
+    assert app_module.csv_escape("\tcmd") == "'\tcmd"
+    assert app_module.csv_escape("\rcmd") == "'\rcmd"
+    assert app_module.csv_escape("ski, trip") == "ski, trip"
+    assert app_module.csv_escape(7) == 7
+
+@pytest.mark.parametrize("as_upload", [False, True])
+def test_import_accepts_csv_with_a_bom(app, admin_headers, as_upload):
+    client = app.test_client()
+    body = "\ufeffusername,start_date,end_date\nalice,2030-06-01,2030-06-02\n".encode("utf-8")
+    if as_upload:
+        response = client.post(
+            "/api/v1/bookings/import",
+            data={"file": (io.BytesIO(body), "holidays.csv")},
+            headers=admin_headers,
+        )
+    else:
+        response = client.post(
+            "/api/v1/bookings/import", data=body, headers={**admin_headers, "Content-Type": "text/csv"}
+        )
+    assert response.status_code == 200, response.data
+    assert response.get_json()["inserted"] == 1
+
+
+def test_import_rejects_non_utf8_bodies(app, admin_headers):
+    response = app.test_client().post(
+        "/api/v1/bookings/import",
+        data="username,start_date,end_date\nzoë,2030-06-01,2030-06-02\n".encode("latin-1"),
+        headers={**admin_headers, "Content-Type": "text/csv"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+"""
+Vacation Tracker benchmark
+
+Seeds a SQLite database with a realistic booking history and measures the
+main endpoints (calendar, overview, booking creation and edits):
+1. In-process through the Flask test client, including SQL statement counts
+2. Over HTTP against a local gunicorn started on the seeded database, with
+   SQL statement counts read from its /metrics before and after each endpoint
+
+`--mode hashing` instead measures password checks (logins) per second per
+core for candidate PASSWORD_HASH_METHOD settings.
+
+Usage:
+  pip install -r backend/requirements.txt
+  python3 benchmark.py --users 200 --bookings 50000 --years 5
+  python3 benchmark.py --mode gunicorn --workers 4 --concurrency 8
+  python3 benchmark.py --json results.json   # keep results to compare runs
+  python3 benchmark.py --mode gunicorn --sso-latency 500 --gunicorn-arg=--worker-class=sync --gunicorn-arg=--threads=1
+  python3 benchmark.py --mode gunicorn --pam-latency 8000
+  python3 benchmark.py --mode hashing --hash-method scrypt --hash-method pbkdf2:sha256:600000
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import sqlite3
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+BENCH_ADMIN = "bench-admin"
+BENCH_PASSWORD = "bench-password"
+FAKE_ENTRA_TENANT = "bench-tenant"
+FAKE_ENTRA_CLIENT = "bench-client"
+
+# Counts every SQL statement the app sends to SQLite while a request runs.
+_statements = threading.local()
+
+
+def _count_statement(_sql):
+    _statements.count = getattr(_statements, "count", 0) + 1
+
+
+def install_statement_counter():
+    """Trace statements on every SQLite connection opened from now on."""
+    real_connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(_count_statement)
+        return conn
+
+    sqlite3.connect = traced_connect
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(name, latencies, elapsed, statements=None):
+    ordered = sorted(latencies)
+    return {
+        "endpoint": name,
+        "requests": len(ordered),
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "throughput_rps": len(ordered) / elapsed if elapsed else 0.0,
+        "sql_per_request": (sum(statements) / len(statements)) if statements else None,
+    }
+
+
+def print_results(title, results):
+    print(f"\n{title}")
+    print("-" * 92)
+    print(f"{'endpoint':<26}{'requests':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'SQL/req':>10}")
+    for row in results:
+        sql = f"{row['sql_per_request']:.1f}" if row["sql_per_request"] is not None else "-"
+        print(
+            f"{row['endpoint']:<26}{row['requests']:>9}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['p99_ms']:>10.2f}{row['throughput_rps']:>10.1f}{sql:>10}"
+        )
+
+
+def seed_database(db_path, users, bookings, years, seed):
+    """Create users and non-overlapping bookings spread over `years` years."""
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    # One hash for everyone keeps seeding fast; the bench admin gets its own.
+    shared_hash = generate_password_hash("seeded-user")
+    usernames = [f"user{i:04d}" for i in range(users)]
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+        [(name, shared_hash) for name in usernames],
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO users (username, password_hash, is_admin) VALUES (?, ?, 1)",
+        (BENCH_ADMIN, generate_password_hash(BENCH_PASSWORD)),
+    )
+
+    total_days = years * 365
+    first_day = date.today() - timedelta(days=total_days - 180)
+    per_user = max(1, min(bookings // max(users, 1), total_days))
+    rows = []
+    for username in usernames:
+        starts = sorted(rng.sample(range(total_days), per_user))
+        for index, start in enumerate(starts):
+            following = starts[index + 1] if index + 1 < len(starts) else total_days
+            length = rng.randint(1, max(1, min(10, following - start)))
+            slot = rng.choice(["am", "pm"]) if rng.random() < 0.2 else None
+            start_date = first_day + timedelta(days=start)
+            end_date = start_date + timedelta(days=length - 1)
+            comment = rng.choice([None, None, "Holiday", "Family trip", "Doctor"])
+            rows.append((username, start_date.isoformat(), end_date.isoformat(), comment, slot))
+    conn.executemany(
+        "INSERT INTO vacations (username, start_date, end_date, comment, slot) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+class Workload:
+    """The request mix, independent of how requests are sent."""
+
+    def __init__(self, seed, first_free_day):
+        self.rng = random.Random(seed)
+        self.today = date.today()
+        self._next_free_day = first_free_day
+        self._lock = threading.Lock()
+
+    def calendar(self):
+        offset = self.rng.randint(-2, 2)
+        month_index = self.today.year * 12 + self.today.month - 1 + offset
+        query = urlencode({"year": month_index // 12, "month": month_index % 12 + 1})
+        return "GET", f"/calendar?{query}", None
+
+    def overview(self):
+        return "GET", "/overview", None
+
+    def create_booking(self):
+        # Walk forward through unused future days so every booking succeeds.
+        with self._lock:
+            day = self._next_free_day
+            self._next_free_day += timedelta(days=1)
+        form = {
+            "start_date": day.isoformat(),
+            "end_date": day.isoformat(),
+            "slot_mode": "full",
+            "comment": "bench",
+        }
+        return "POST", f"/calendar?year={day.year}&month={day.month}", form
+
+    def edit_booking(self, booking_id, start_date, end_date):
+        form = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "slot_mode": "full",
+            "comment": f"edited {self.rng.randint(0, 10**6)}",
+        }
+        return "POST", f"/booking/{booking_id}/edit", form
+
+
+def first_free_day(db_path):
+    """Bookings are created after anything an earlier run left behind."""
+    conn = sqlite3.connect(db_path)
+    latest = conn.execute(
+        "SELECT MAX(end_date) FROM vacations WHERE username = ?", (BENCH_ADMIN,)
+    ).fetchone()[0]
+    conn.close()
+    floor = date.today() + timedelta(days=3650)
+    if latest is None:
+        return floor
+    return max(floor, date.fromisoformat(latest) + timedelta(days=1))
+
+
+def bench_admin_bookings(db_path, limit):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT id, start_date, end_date FROM vacations WHERE username = ? ORDER BY id LIMIT ?",
+        (BENCH_ADMIN, limit),
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def run_flask(db_path, requests_per_endpoint, seed):
+    """Drive the app in-process through the Flask test client."""
+    install_statement_counter()
+    os.environ["VACATION_DB_PATH"] = db_path
+    os.environ.pop("DATABASE_URL", None)
+    sys.path.insert(0, BACKEND_DIR)
+    import app as app_module
+
+    app = app_module.create_app()
+    client = app.test_client()
+    response = client.post("/login", data={"username": BENCH_ADMIN, "password": BENCH_PASSWORD})
+    if response.status_code != 302:
+        raise SystemExit("Could not log in as the benchmark admin.")
+
+    workload = Workload(seed, first_free_day(db_path))
+    results = []
+
+    def measure(name, make_request):
+        latencies, statements = [], []
+        started = time.perf_counter()
+        for _ in range(requests_per_endpoint):
+            method, path, form = make_request()
+            _statements.count = 0
+            t0 = time.perf_counter()
+            response = client.open(path, method=method, data=form)
+            latencies.append(time.perf_counter() - t0)
+            statements.append(_statements.count)
+            if response.status_code >= 400:
+                raise SystemExit(f"{name}: {path} returned {response.status_code}")
+        results.append(summarize(name, latencies, time.perf_counter() - started, statements))
+
+    measure("GET /calendar", workload.calendar)
+    measure("GET /overview", workload.overview)
+    measure("POST /calendar", workload.create_booking)
+    own = bench_admin_bookings(db_path, requests_per_endpoint)
+    if own:
+        measure(
+            "POST /booking/edit",
+            lambda: workload.edit_booking(*own[workload.rng.randrange(len(own))]),
+        )
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def http_request(port, method, path, form=None, cookie=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {}
+    body = None
+    if cookie:
+        headers["Cookie"] = cookie
+    if form is not None:
+        body = urlencode(form)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response
+
+
+SQL_SAMPLE = re.compile(r'^vacation_tracker_sql_statements_(sum|count)\{endpoint="([^"]*)"\} (\S+)$')
+
+
+def scrape_sql_statements(port, token):
+    """Per-endpoint (statements, requests) totals from /metrics, summed over workers."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    conn.request("GET", "/metrics", headers={"Authorization": f"Bearer {token}"})
+    response = conn.getresponse()
+    body = response.read().decode()
+    conn.close()
+    if response.status != 200:
+        return None
+    totals = {}
+    for line in body.splitlines():
+        match = SQL_SAMPLE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            statements, requests = totals.get(endpoint, (0.0, 0.0))
+            if kind == "sum":
+                statements += float(value)
+            else:
+                requests += float(value)
+            totals[endpoint] = (statements, requests)
+    return totals
+
+
+def _b64_json(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).rstrip(b"=").decode()
+
+
+class FakeEntraHandler(BaseHTTPRequestHandler):
+    """Just enough of the Entra v2.0 endpoints for MSAL's auth code flow.
+
+    The token endpoint sleeps for `server.latency` seconds first, standing in
+    for the round-trip to Microsoft.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        base = f"https://127.0.0.1:{self.server.server_port}/{FAKE_ENTRA_TENANT}"
+        self._send_json(
+            {
+                "authorization_endpoint": f"{base}/oauth2/v2.0/authorize",
+                "token_endpoint": f"{base}/oauth2/v2.0/token",
+                "issuer": f"{base}/v2.0",
+            }
+        )
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        now = int(time.time())
+        claims = {
+            "aud": FAKE_ENTRA_CLIENT,
+            "iss": f"https://127.0.0.1:{self.server.server_port}/{FAKE_ENTRA_TENANT}/v2.0",
+            "iat": now,
+            "nbf": now,
+            "exp": now + 600,
+            "sub": "bench-sso",
+            "oid": "bench-sso",
+            "tid": FAKE_ENTRA_TENANT,
+            "name": "Bench SSO User",
+        }
+        self._send_json(
+            {
+                "token_type": "Bearer",
+                "access_token": "bench",
+                "expires_in": 3600,
+                "scope": "User.Read",
+                "id_token": f"{_b64_json({'alg': 'none'})}.{_b64_json(claims)}.",
+            }
+        )
+
+
+def start_fake_entra(workdir, latency):
+    """Serve FakeEntraHandler over HTTPS (MSAL refuses plain HTTP)."""
+    cert = os.path.join(workdir, "fake-entra-cert.pem")
+    key = os.path.join(workdir, "fake-entra-key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeEntraHandler)
+    server.latency = latency
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cert
+
+
+def enable_fake_sso(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        UPDATE entra_config
+        SET tenant_id = ?, client_id = ?, client_secret = ?, enabled = 1, version = version + 1
+        WHERE id = 1
+        """,
+        (FAKE_ENTRA_TENANT, FAKE_ENTRA_CLIENT, "bench-secret"),
+    )
+    conn.commit()
+    conn.close()
+
+
+# Written next to the database and put first on the workers' PYTHONPATH.
+FAKE_PAM_MODULE = f'''"""Stand-in for python-pam used by benchmark.py."""
+
+import os
+import time
+
+
+class pam:
+    def __init__(self):
+        self.reason = None
+
+    def authenticate(self, username, password, service="login"):
+        # The benchmark admin logs in without delay so the run can start.
+        if username != "{BENCH_ADMIN}":
+            time.sleep(float(os.environ["BENCH_PAM_LATENCY"]))
+        self.reason = "Authentication failure"
+        return password == "{BENCH_PASSWORD}"
+'''
+
+
+def run_gunicorn(
+    db_path,
+    requests_per_endpoint,
+    seed,
+    workers,
+    concurrency,
+    worker_args,
+    sso_latency=None,
+    pam_latency=None,
+):
+    """Drive a local gunicorn over HTTP with `concurrency` client threads.
+
+    With `sso_latency` (seconds), the calendar is measured again while the
+    same number of extra clients keep completing SSO logins against a fake
+    Entra whose token endpoint answers after that delay. `pam_latency` does
+    the same for password logins against a fake PAM module.
+    """
+    port = free_port()
+    metrics_token = base64.urlsafe_b64encode(os.urandom(18)).decode()
+    env = dict(
+        os.environ,
+        VACATION_DB_PATH=db_path,
+        AUTH_BACKEND="internal",
+        FLASK_SECRET_KEY="bench",
+        # SQL statement counts come from /metrics, summed over the workers.
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(os.path.dirname(db_path), "prometheus"),
+        METRICS_TOKEN=metrics_token,
+    )
+    env.pop("DATABASE_URL", None)
+    if pam_latency is not None:
+        fake_pam_dir = os.path.join(os.path.dirname(db_path), "fake-pam")
+        os.makedirs(fake_pam_dir, exist_ok=True)
+        with open(os.path.join(fake_pam_dir, "pam.py"), "w") as handle:
+            handle.write(FAKE_PAM_MODULE)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [fake_pam_dir, env.get("PYTHONPATH")]))
+        env["AUTH_BACKEND"] = "pam"
+        env["BENCH_PAM_LATENCY"] = str(pam_latency)
+    fake_entra = None
+    if sso_latency is not None:
+        fake_entra, cert = start_fake_entra(os.path.dirname(db_path), sso_latency)
+        enable_fake_sso(db_path)
+        env["ENTRA_AUTHORITY_HOST"] = f"https://127.0.0.1:{fake_entra.server_port}"
+        # MSAL talks to Entra through requests, which honours this bundle.
+        env["REQUESTS_CA_BUNDLE"] = cert
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "-b", f"127.0.0.1:{port}",
+        "-w", str(workers),
+        *worker_args,
+        "app:create_app()",
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                http_request(port, "GET", "/login")
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise SystemExit("gunicorn did not start.")
+                time.sleep(0.2)
+
+        response = http_request(
+            port, "POST", "/login", {"username": BENCH_ADMIN, "password": BENCH_PASSWORD}
+        )
+        cookie = (response.getheader("Set-Cookie") or "").split(";", 1)[0]
+        if response.status != 302 or not cookie:
+            raise SystemExit("Could not log in as the benchmark admin.")
+
+        workload = Workload(seed, first_free_day(db_path))
+        results = []
+
+        def measure(name, make_request, endpoint):
+            def one(_):
+                method, path, form = make_request()
+                t0 = time.perf_counter()
+                response = http_request(port, method, path, form, cookie)
+                if response.status >= 400:
+                    raise SystemExit(f"{name}: {path} returned {response.status}")
+                return time.perf_counter() - t0
+
+            before = scrape_sql_statements(port, metrics_token)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = list(pool.map(one, range(requests_per_endpoint)))
+            elapsed = time.perf_counter() - started
+            after = scrape_sql_statements(port, metrics_token)
+            row = summarize(name, latencies, elapsed)
+            if before is not None and after is not None:
+                statements_before, requests_before = before.get(endpoint, (0.0, 0.0))
+                statements_after, requests_after = after.get(endpoint, (0.0, 0.0))
+                if requests_after > requests_before:
+                    row["sql_per_request"] = (
+                        (statements_after - statements_before) / (requests_after - requests_before)
+                    )
+            results.append(row)
+
+        measure("GET /calendar", workload.calendar, "calendar_view")
+        measure("GET /overview", workload.overview, "overview")
+        measure("POST /calendar", workload.create_booking, "calendar_view")
+        own = bench_admin_bookings(db_path, requests_per_endpoint)
+        if own:
+            measure(
+                "POST /booking/edit",
+                lambda: workload.edit_booking(*own[workload.rng.randrange(len(own))]),
+                "edit_booking",
+            )
+        if fake_entra is not None:
+            run_login_storm(
+                port, concurrency, measure, workload, results,
+                "SSO", "GET", "/auth/entra/callback?code=bench",
+            )
+        if pam_latency is not None:
+            run_login_storm(
+                port, concurrency, measure, workload, results,
+                "PAM", "POST", "/login", {"username": "pam-user", "password": BENCH_PASSWORD},
+            )
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if fake_entra is not None:
+            fake_entra.shutdown()
+
+
+def run_login_storm(port, concurrency, measure, workload, results, label, method, path, form=None):
+    """Measure the calendar while `concurrency` clients keep logging in."""
+    stop = threading.Event()
+    latencies = []
+    failures = []
+
+    def login_loop():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            response = http_request(port, method, path, form)
+            latencies.append(time.perf_counter() - t0)
+            if response.status != 302 or "/calendar" not in (response.getheader("Location") or ""):
+                failures.append(response.status)
+
+    threads = [threading.Thread(target=login_loop) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        measure(f"GET /calendar ({label})", workload.calendar, "calendar_view")
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    results.append(summarize(f"{method} {path.split('?')[0]}", latencies, time.perf_counter() - started))
+    if failures:
+        print(f"{label}: {len(failures)} of {len(latencies)} logins did not succeed (timeouts or errors).")
+
+
+DEFAULT_HASH_METHODS = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+]
+
+
+def run_hashing(methods, rounds):
+    """Time check_password_hash on one thread: logins per second per core."""
+    from werkzeug.security import check_password_hash, generate_password_hash
+
+    print(f"\nPassword hash cost ({rounds} checks per method, one thread)")
+    print("-" * 72)
+    print(f"{'method':<28}{'stored as':<24}{'ms/login':>10}{'logins/s/core':>14}")
+    results = []
+    for method in methods:
+        stored = generate_password_hash(BENCH_PASSWORD, method=method)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            if not check_password_hash(stored, BENCH_PASSWORD):
+                raise SystemExit(f"{method}: hash did not verify")
+        per_login = (time.perf_counter() - started) / rounds
+        row = {
+            "method": method,
+            "stored_as": stored.split("$", 1)[0],
+            "ms_per_login": per_login * 1000,
+            "logins_per_second_per_core": 1 / per_login,
+        }
+        results.append(row)
+        print(
+            f"{method:<28}{row['stored_as']:<24}{row['ms_per_login']:>10.1f}"
+            f"{row['logins_per_second_per_core']:>14.1f}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vacation tracker")
+    parser.add_argument("--users", type=int, default=50, help="Seeded users (default: %(default)s)")
+    parser.add_argument("--bookings", type=int, default=20000, help="Seeded bookings (default: %(default)s)")
+    parser.add_argument("--years", type=int, default=5, help="Years of history (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint (default: %(default)s)")
+    parser.add_argument("--mode", choices=["flask", "gunicorn", "both", "hashing"], default="flask")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="HTTP client threads (default: %(default)s)")
+    parser.add_argument("--gunicorn-arg", action="append", default=[], help="Extra gunicorn argument (repeatable)")
+    parser.add_argument(
+        "--sso-latency",
+        type=float,
+        help="gunicorn mode: also measure the calendar during an SSO login storm against a fake Entra "
+        "whose token endpoint takes this many milliseconds",
+    )
+    parser.add_argument(
+        "--pam-latency",
+        type=float,
+        help="gunicorn mode: also measure the calendar during a login storm against a fake PAM "
+        "module that takes this many milliseconds per call",
+    )
+    parser.add_argument(
+        "--hash-method",
+        action="append",
+        help="hashing mode: PASSWORD_HASH_METHOD value to measure (repeatable; default: a scrypt/pbkdf2 set)",
+    )
+    parser.add_argument("--hash-rounds", type=int, default=20, help="hashing mode: checks per method (default: %(default)s)")
+    parser.add_argument("--db", help="Reuse or create this database instead of a temporary one")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: %(default)s)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.mode == "hashing":
+        results = run_hashing(args.hash_method or DEFAULT_HASH_METHODS, args.hash_rounds)
+        if args.json:
+            with open(args.json, "w") as handle:
+                json.dump({"hashing": results}, handle, indent=2)
+            print(f"\nWrote {args.json}")
+        return
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="vt-bench-"), "vacations.db")
+    os.environ.setdefault("AUTH_BACKEND", "internal")
+    os.environ.setdefault("FLASK_SECRET_KEY", "bench")
+    os.environ["ADMIN_USERS"] = BENCH_ADMIN
+
+    # Let the app create the schema, then seed if the database is empty.
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app:create_app", "init-db"],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, VACATION_DB_PATH=db_path),
+        check=True,
+    )
+    existing = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM vacations").fetchone()[0]
+    if existing == 0:
+        started = time.perf_counter()
+        seeded = seed_database(db_path, args.users, args.bookings, args.years, args.seed)
+        print(f"Seeded {seeded} bookings for {args.users} users in {time.perf_counter() - started:.1f}s ({db_path})")
+    else:
+        print(f"Using existing database with {existing} bookings ({db_path})")
+
+    report = {
+        "users": args.users,
+        "bookings": args.bookings,
+        "years": args.years,
+        "requests_per_endpoint": args.requests,
+    }
+    if args.mode in ("gunicorn", "both"):
+        report["gunicorn"] = run_gunicorn(
+            db_path,
+            args.requests,
+            args.seed,
+            args.workers,
+            args.concurrency,
+            args.gunicorn_arg,
+            sso_latency=args.sso_latency / 1000.0 if args.sso_latency is not None else None,
+            pam_latency=args.pam_latency / 1000.0 if args.pam_latency is not None else None,
+        )
+        print_results(
+            f"gunicorn ({args.workers} workers, {args.concurrency} client threads)",
+            report["gunicorn"],
+        )
+    if args.mode in ("flask", "both"):
+        report["flask"] = run_flask(db_path, args.requests, args.seed)
+        print_results("Flask test client (in-process)", report["flask"])
+
+    if args.json:
+        with open(args.json, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
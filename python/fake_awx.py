@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Fake AWX API for trying out setup_awx.py locally
+
+Serves the small part of /api/v2/ that setup_awx.py uses (projects,
+inventories, hosts, bulk host creation, job templates, launches) from
+memory, with optional per-request latency to mimic a kubectl port-forward
+and optional faults (503 with Retry-After, stalled responses) to exercise
+setup_awx.py's timeouts and retries.
+
+Usage:
+  python3 fake_awx.py --port 8080 --latency 50 &
+  python3 fake_awx.py --port 8080 --fail-rate 0.2 --stall-rate 0.02 &
+  python3 setup_awx.py --host http://localhost:8080 --password x
+  curl http://localhost:8080/fake/stats    # requests served, by method
+
+tests/test_setup_awx.py runs setup_awx.py against it: python3 -m pytest tests
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+# AWX's default BULK_HOST_MAX_CREATE.
+BULK_HOST_MAX_CREATE = 100
+
+COLLECTION = re.compile(r"^/api/v2/(projects|inventories|job_templates|hosts)/$")
+DETAIL = re.compile(r"^/api/v2/(projects|inventories|job_templates|hosts)/(\d+)/$")
+INVENTORY_HOSTS = re.compile(r"^/api/v2/inventories/(\d+)/hosts/$")
+LAUNCH = re.compile(r"^/api/v2/job_templates/(\d+)/launch/$")
+BULK_HOST_CREATE = "/api/v2/bulk/host_create/"
+
+# Writable fields and their defaults (a subset of AWX's). Like AWX, the fake
+# returns every field and silently drops unknown ones on write.
+FIELDS = {
+    "projects": {
+        "name": "", "description": "", "organization": None, "local_path": "",
+        "scm_type": "", "scm_url": "", "scm_branch": "", "scm_refspec": "",
+        "scm_clean": False, "scm_track_submodules": False, "scm_delete_on_update": False,
+        "credential": None, "timeout": 0, "scm_update_on_launch": False,
+        "scm_update_cache_timeout": 0, "allow_override": False, "default_environment": None,
+    },
+    "inventories": {
+        "name": "", "description": "", "organization": None, "kind": "",
+        "host_filter": None, "variables": "", "prevent_instance_group_fallback": False,
+    },
+    "hosts": {
+        "name": "", "description": "", "inventory": None, "enabled": True,
+        "instance_id": "", "variables": "",
+    },
+    "job_templates": {
+        "name": "", "description": "", "job_type": "run", "inventory": None,
+        "project": None, "playbook": "", "scm_branch": "", "forks": 0, "limit": "",
+        "verbosity": 0, "extra_vars": "", "job_tags": "", "skip_tags": "",
+        "force_handlers": False, "start_at_task": "", "timeout": 0,
+        "use_fact_cache": False, "execution_environment": None, "host_config_key": "",
+        "ask_scm_branch_on_launch": False, "ask_diff_mode_on_launch": False,
+        "ask_variables_on_launch": False, "ask_limit_on_launch": False,
+        "ask_tags_on_launch": False, "ask_skip_tags_on_launch": False,
+        "ask_job_type_on_launch": False, "ask_verbosity_on_launch": False,
+        "ask_inventory_on_launch": False, "ask_credential_on_launch": False,
+        "survey_enabled": False, "become_enabled": False, "diff_mode": False,
+        "allow_simultaneous": False,
+    },
+}
+
+
+def known_fields(kind, data):
+    return {key: value for key, value in data.items() if key in FIELDS[kind]}
+
+
+class FakeAWX:
+    """In-memory AWX objects, shared by all request threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects = {"projects": {}, "inventories": {}, "job_templates": {}, "hosts": {}}
+        self.next_id = 1
+        self.jobs = 0
+        self.stats = {}
+        self.create("inventories", {"name": "Demo Inventory", "organization": 1})
+
+    def create(self, kind, data):
+        obj = dict(FIELDS[kind], **known_fields(kind, data), id=self.next_id)
+        self.next_id += 1
+        self.objects[kind][obj["id"]] = obj
+        return obj
+
+    def page(self, path, items, query):
+        name = query.get("name", [None])[0]
+        if name is not None:
+            items = [item for item in items if item.get("name") == name]
+        page_size = min(int(query.get("page_size", [PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * page_size
+        results = items[start:start + page_size]
+
+        def link(number):
+            params = {key: values[0] for key, values in query.items()}
+            params["page"] = number
+            return f"{path}?{urlencode(params)}"
+
+        return {
+            "count": len(items),
+            "next": link(page + 1) if start + page_size < len(items) else None,
+            "previous": link(page - 1) if page > 1 else None,
+            "results": results,
+        }
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeAWX/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def awx(self) -> FakeAWX:
+        return self.server.awx
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _begin(self):
+        """Count the request and apply latency; True if a fault was injected"""
+        time.sleep(self.server.latency)
+        with self.awx.lock:
+            self.awx.stats[self.command] = self.awx.stats.get(self.command, 0) + 1
+        if random.random() < self.server.fail_rate:
+            with self.awx.lock:
+                self.awx.stats["503"] = self.awx.stats.get("503", 0) + 1
+            body = json.dumps({"detail": "Service Unavailable"}).encode()
+            self.send_response(503)
+            self.send_header("Retry-After", str(self.server.retry_after))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return True
+        if random.random() < self.server.stall_rate:
+            # The request is still processed, just too late for the client.
+            with self.awx.lock:
+                self.awx.stats["stalled"] = self.awx.stats.get("stalled", 0) + 1
+            time.sleep(self.server.stall)
+        return False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/fake/stats":
+            with self.awx.lock:
+                return self._send(200, dict(self.awx.stats, total=sum(self.awx.stats.values())))
+        if self._begin():
+            return
+        with self.awx.lock:
+            if match := COLLECTION.match(url.path):
+                items = sorted(self.awx.objects[match[1]].values(), key=lambda item: item["id"])
+                return self._send(200, self.awx.page(url.path, items, query))
+            if match := INVENTORY_HOSTS.match(url.path):
+                inventory = int(match[1])
+                items = [
+                    host
+                    for host in sorted(self.awx.objects["hosts"].values(), key=lambda item: item["id"])
+                    if host["inventory"] == inventory
+                ]
+                return self._send(200, self.awx.page(url.path, items, query))
+            if match := DETAIL.match(url.path):
+                obj = self.awx.objects[match[1]].get(int(match[2]))
+                return self._send(200, obj) if obj else self._send(404, {"detail": "Not found."})
+        self._send(404, {"detail": "Not found."})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        data = self._body()
+        if self._begin():
+            return
+        with self.awx.lock:
+            if match := COLLECTION.match(url.path):
+                kind = match[1]
+                if any(obj.get("name") == data.get("name") for obj in self.awx.objects[kind].values()):
+                    return self._send(400, {"name": [f"{kind} with this Name already exists."]})
+                return self._send(201, self.awx.create(kind, data))
+            if match := INVENTORY_HOSTS.match(url.path):
+                inventory = int(match[1])
+                if inventory not in self.awx.objects["inventories"]:
+                    return self._send(404, {"detail": "Not found."})
+                for host in self.awx.objects["hosts"].values():
+                    if host["inventory"] == inventory and host["name"] == data.get("name"):
+                        return self._send(400, {"__all__": ["Host with this Name and Inventory already exists."]})
+                return self._send(201, self.awx.create("hosts", dict(data, inventory=inventory)))
+            if url.path == BULK_HOST_CREATE and self.server.bulk:
+                return self._bulk_host_create(data)
+            if match := LAUNCH.match(url.path):
+                if int(match[1]) not in self.awx.objects["job_templates"]:
+                    return self._send(404, {"detail": "Not found."})
+                self.awx.jobs += 1
+                return self._send(201, {"id": self.awx.jobs, "job": self.awx.jobs})
+        self._send(404, {"detail": "Not found."})
+
+    def _bulk_host_create(self, data):
+        inventory = data.get("inventory")
+        hosts = data.get("hosts", [])
+        if inventory not in self.awx.objects["inventories"]:
+            return self._send(400, {"inventory": ["Invalid inventory."]})
+        if len(hosts) > BULK_HOST_MAX_CREATE:
+            return self._send(400, {"hosts": [f"Number of hosts exceeds system setting BULK_HOST_MAX_CREATE ({BULK_HOST_MAX_CREATE})."]})
+        existing = {
+            host["name"] for host in self.awx.objects["hosts"].values() if host["inventory"] == inventory
+        }
+        duplicates = [host["name"] for host in hosts if host["name"] in existing]
+        if duplicates:
+            return self._send(400, {"__all__": [f"Hosts with names {duplicates} already exist in inventory."]})
+        created = [self.awx.create("hosts", dict(host, inventory=inventory)) for host in hosts]
+        self._send(
+            201,
+            {
+                "url": f"/api/v2/inventories/{inventory}/hosts/",
+                "hosts": [{"name": host["name"], "id": host["id"]} for host in created],
+            },
+        )
+
+    def do_PATCH(self):
+        url = urlparse(self.path)
+        data = self._body()
+        if self._begin():
+            return
+        with self.awx.lock:
+            if match := DETAIL.match(url.path):
+                obj = self.awx.objects[match[1]].get(int(match[2]))
+                if obj is None:
+                    return self._send(404, {"detail": "Not found."})
+                obj.update(known_fields(match[1], data))
+                return self._send(200, obj)
+        self._send(404, {"detail": "Not found."})
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out on a stalled call have hung up; expected.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(port, latency, bulk=True, fail_rate=0, retry_after=1, stall_rate=0, stall=60):
+    server = Server(("127.0.0.1", port), Handler)
+    server.awx = FakeAWX()
+    server.latency = latency
+    server.bulk = bulk
+    server.fail_rate = fail_rate
+    server.retry_after = retry_after
+    server.stall_rate = stall_rate
+    server.stall = stall
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake AWX API for setup_awx.py")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0, help="Milliseconds added to every API call (default: %(default)s)")
+    parser.add_argument("--no-bulk", action="store_true", help="Act like an AWX without the bulk API (before 22.x)")
+    parser.add_argument("--fail-rate", type=float, default=0, help="Fraction of API calls answered with 503 (default: %(default)s)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with the 503s (default: %(default)s)")
+    parser.add_argument("--stall-rate", type=float, default=0, help="Fraction of API calls held for --stall seconds (default: %(default)s)")
+    parser.add_argument("--stall", type=float, default=60, help="Seconds a stalled call is held (default: %(default)s)")
+    args = parser.parse_args()
+
+    server = serve(
+        args.port,
+        args.latency / 1000.0,
+        bulk=not args.no_bulk,
+        fail_rate=args.fail_rate,
+        retry_after=args.retry_after,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+    )
+    print(f"Fake AWX listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests served: {server.awx.stats}")
+
+
+if __name__ == "__main__":
+    main()
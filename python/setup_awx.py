@@ -6,182 +6,435 @@ This script creates:
 1. An AWX project pointing to the devops-kt Git repository
 2. A job template using the simple-playbook.yaml with default inventory
 
+The desired project, inventory, hosts and job template are read from awx.yaml
+(see --config). Live objects are compared with it and only the fields that
+differ are written, so re-running with an unchanged file makes no changes;
+--plan prints the differences without writing anything.
+
+Independent API calls (e.g. the project and the inventory, or the hosts of an
+inventory) run concurrently; see --concurrency. To try it without a cluster,
+run fake_awx.py and point --host at it.
+
 Setup:
-  1. Get the password: kubectl -n awx get secret awx-demo-admin-password -o jsonpath='{.data.password}' | base64 -d
-  2. Start port-forward: kubectl -n awx port-forward svc/awx-demo-service 8080:80 &
-  3. Run this script: python3 setup_awx.py
+  1. Install the dependencies: pip install -r requirements.txt (requests, PyYAML)
+  2. Get the password: kubectl -n awx get secret awx-demo-admin-password -o jsonpath='{.data.password}' | base64 -d
+  3. Start port-forward: kubectl -n awx port-forward svc/awx-demo-service 8080:80 &
+  4. Run this script: python3 setup_awx.py
 """
 
 import requests
 import json
+import os
+import random
+import re
 import sys
-from urllib.parse import urljoin
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse
 import time
 
+try:
+    import yaml
+except ImportError:  # only needed to read the state file
+    yaml = None
+
 # AWX Configuration
 AWX_HOST = "http://localhost:8080"  # Use port-forward: kubectl -n awx port-forward svc/awx-demo-service 8080:80
 AWX_USERNAME = ""
 AWX_PASSWORD = ""  # Will be set from env or arg
 
-# Project Configuration
-PROJECT_NAME = "devops-kt"
-GIT_URL = "https://github.com/pizour/devops-kt/"
-
-# Job Template Configuration
-JOB_TEMPLATE_NAME = "gather-vm-info"
-PLAYBOOK_NAME = "ansible/gather-vm-info.yaml"
-
-# Inventory Configuration
-INVENTORY_NAME = "devops-kt"
-INVENTORY_DESCRIPTION = "DevOps-KT Infrastructure Inventory"
-
-# Hosts to add
-HOSTS = [
-    {
-        "name": "fw-nva",
-        "description": "Ubuntu NVA Firewall",
-        "variables": {
-            "ansible_host": "10.0.0.10",
-            "ansible_connection": "ssh",
-        }
-    }
-]
+# Desired project, inventory, hosts and job template
+DEFAULT_STATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "awx.yaml")
+
+# Fields AWX stores as JSON/YAML text; they are compared by value.
+VARIABLE_FIELDS = ("variables", "extra_vars")
+
+
+def load_state(path):
+    """Read the desired AWX state from a YAML file"""
+    if yaml is None:
+        raise SystemExit("✗ PyYAML is required to read the state file: pip install pyyaml")
+    with open(path) as f:
+        state = yaml.safe_load(f) or {}
+    if not isinstance(state, dict):
+        raise SystemExit(f"✗ {path}: expected a mapping of sections, got {type(state).__name__}")
+    missing = [key for key in ("project", "inventory", "job_template") if not state.get(key)]
+    if missing:
+        raise SystemExit(f"✗ {path}: missing section(s): {', '.join(missing)}")
+    for key in ("project", "inventory", "job_template"):
+        if not isinstance(state[key], dict):
+            raise SystemExit(f"✗ {path}: '{key}' must be a mapping, got {type(state[key]).__name__}")
+    # An empty "hosts:" key loads as None.
+    state["hosts"] = state.get("hosts") or []
+    if not isinstance(state["hosts"], list):
+        raise SystemExit(f"✗ {path}: 'hosts' must be a list, got {type(state['hosts']).__name__}")
+    return state
+
+
+def parse_variables(value):
+    """Variables as AWX stores them (JSON or YAML text) parsed into a dict"""
+    if not isinstance(value, str):
+        return value or {}
+    try:
+        return yaml.safe_load(value) or {}
+    except yaml.YAMLError:
+        return value
+
+
+def field_changes(current, desired, label=None):
+    """Fields of `desired` that differ from the live object `current`
+
+    Keys the live object does not have are skipped (with a warning when
+    `label` names the object): AWX ignores unknown fields on write, so they
+    would otherwise show up as a change on every run.
+    """
+    changes = {}
+    for key, value in desired.items():
+        if key not in current:
+            if label:
+                print(f"⚠ {label} has no field '{key}'; ignoring it (check the state file)")
+            continue
+        if key in VARIABLE_FIELDS:
+            if parse_variables(current.get(key)) != parse_variables(value):
+                changes[key] = value
+        elif current.get(key) != value:
+            changes[key] = value
+    return changes
+
+
+def describe_change(key, current, value):
+    if key in VARIABLE_FIELDS:
+        # May hold credentials (e.g. ansible_password); don't print them.
+        return f"{key} changed"
+    return f"{key}: {current!r} → {value!r}"
+
+
+class TaskGraph:
+    """Runs named tasks as soon as all of their dependencies have finished.
+
+    Independent tasks run concurrently on a bounded thread pool, so the total
+    time follows the depth of the graph rather than the number of tasks. Each
+    task receives the results of its dependencies; a task whose dependency
+    failed (returned None or raised) is skipped and its result is None.
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.tasks = {}
+
+    def add(self, name, func, deps=()):
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        self.tasks[name] = (func, tuple(deps))
+
+    def run(self):
+        results = {}
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if not all(dep in results for dep in deps):
+                        continue
+                    del pending[name]
+                    if any(results[dep] is None for dep in deps):
+                        print(f"✗ Skipping {name}: a dependency failed")
+                        results[name] = None
+                        continue
+                    future = pool.submit(func, *(results[dep] for dep in deps))
+                    running[future] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"✗ {name} failed: {e}")
+                        results[name] = None
+        return results
+
+
+class AWXSession(requests.Session):
+    """requests.Session with timeouts, retries and per-call latency stats
+
+    Every request gets a (connect, read) timeout so a stalled port-forward
+    fails instead of hanging. Idempotent calls are retried on connection
+    errors, timeouts and 429/502/503/504 with exponential backoff and full
+    jitter, waiting for Retry-After instead when the server sends one. POSTs
+    are only retried when the request cannot have been processed: a connect
+    timeout, or a 429/503 that asks to be retried later.
+    """
+
+    RETRY_STATUSES = {429, 502, 503, 504}
+    # The PATCHes in this script set absolute field values, so they are safe
+    # to repeat.
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"}
+    MAX_BACKOFF = 30
+
+    def __init__(self, pool_size=8, connect_timeout=5, read_timeout=30, retries=4, backoff=0.5):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        # One pooled connection per concurrent call; the default of 10 would
+        # discard (and later reopen) connections above that.
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        method = method.upper()
+        label = f"{method} {self.endpoint_label(url)}"
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.record(label, time.perf_counter() - started, error=True)
+                retryable = method in self.IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"  ↻ {label}: {type(e).__name__}, retrying in {delay:.1f}s")
+            else:
+                retry_after = self.retry_after(response)
+                retryable = response.status_code in self.RETRY_STATUSES and (
+                    method in self.IDEMPOTENT_METHODS
+                    or (response.status_code in (429, 503) and retry_after is not None)
+                )
+                self.record(label, time.perf_counter() - started, error=response.status_code >= 500)
+                if not retryable or attempt >= self.retries:
+                    return response
+                delay = retry_after if retry_after is not None else self.backoff_delay(attempt)
+                print(f"  ↻ {label}: {response.status_code}, retrying in {delay:.1f}s")
+            with self.stats_lock:
+                self.stats[label]["retries"] += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def backoff_delay(self, attempt):
+        return random.uniform(0, min(self.MAX_BACKOFF, self.backoff * 2 ** attempt))
+
+    def retry_after(self, response):
+        """Seconds to wait from a Retry-After header (delta or HTTP date)"""
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0), self.MAX_BACKOFF)
+
+    @staticmethod
+    def endpoint_label(url):
+        """/api/v2/inventories/3/hosts/?page=2 → inventories/{id}/hosts"""
+        path = urlparse(url).path.strip("/")
+        if path.startswith("api/v2/"):
+            path = path[len("api/v2/"):]
+        return re.sub(r"(^|/)\d+(?=/|$)", r"\1{id}", path)
+
+    def record(self, label, seconds, error=False):
+        with self.stats_lock:
+            entry = self.stats.setdefault(label, {"times": [], "retries": 0, "errors": 0})
+            entry["times"].append(seconds)
+            entry["errors"] += error
+
+    def report(self):
+        """Print call counts and latency per endpoint"""
+        with self.stats_lock:
+            stats = {label: dict(entry, times=sorted(entry["times"])) for label, entry in self.stats.items()}
+        if not stats:
+            return
+        print(f"\nAPI calls{'':<32} calls   p50 ms   p95 ms   max ms  retries  errors")
+        for label, entry in sorted(stats.items(), key=lambda item: -sum(item[1]["times"])):
+            times = entry["times"]
+            p50 = times[len(times) // 2] * 1000
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))] * 1000
+            print(
+                f"  {label:<39} {len(times):>5} {p50:>8.0f} {p95:>8.0f} {times[-1] * 1000:>8.0f}"
+                f" {entry['retries']:>8} {entry['errors']:>7}"
+            )
+
+
+class ResourceIndex:
+    """Name → object maps of AWX list endpoints, read once per run
+
+    The first lookup on an endpoint walks all of its pages (following `next`
+    links) and later lookups are answered locally, so objects beyond the
+    first page are found and repeated lookups cost no API calls. Objects the
+    client creates or updates are put back into the map.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.maps = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _map(self, endpoint):
+        with self.lock:
+            endpoint_lock = self.locks.setdefault(endpoint, threading.Lock())
+        # Concurrent first lookups of one endpoint share a single sweep.
+        with endpoint_lock:
+            if endpoint not in self.maps:
+                objects = {}
+                for obj in self.client.list_all(self.client.get_url(endpoint)):
+                    # Names are only unique per organization; keep the oldest.
+                    objects.setdefault(obj["name"], obj)
+                self.maps[endpoint] = objects
+            return self.maps[endpoint]
+
+    def get(self, endpoint, name):
+        return self._map(endpoint).get(name)
+
+    def all(self, endpoint):
+        return list(self._map(endpoint).values())
+
+    def put(self, endpoint, obj):
+        with self.locks[endpoint]:
+            self.maps[endpoint][obj["name"]] = obj
 
 
 class AWXClient:
-    def __init__(self, host, username, password):
+    # Page size for list sweeps (AWX's maximum) and hosts per bulk request
+    # (AWX's default BULK_HOST_MAX_CREATE).
+    PAGE_SIZE = 200
+    BULK_HOST_CHUNK = 100
+    # Nodes in setup()'s task graph. While the host sync's own pool holds
+    # `concurrency` connections, the other nodes each hold one more.
+    SETUP_TASKS = 5
+
+    def __init__(self, host, username, password, plan=False, concurrency=8,
+                 connect_timeout=5, read_timeout=30, retries=4):
         self.host = host
         self.username = username
         self.password = password
-        self.session = requests.Session()
+        self.plan = plan
+        self.session = AWXSession(
+            pool_size=concurrency + self.SETUP_TASKS,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries=retries,
+        )
         self.session.auth = (username, password)
         self.session.headers.update({"Content-Type": "application/json"})
+        self.index = ResourceIndex(self)
+        # Objects created/updated (or that would be, with --plan).
+        self.changes = {"created": 0, "updated": 0}
+        self.changes_lock = threading.Lock()
+
+    def count_changes(self, created=0, updated=0):
+        with self.changes_lock:
+            self.changes["created"] += created
+            self.changes["updated"] += updated
 
     def get_url(self, endpoint):
         return urljoin(self.host, f"/api/v2/{endpoint}/")
 
-    def get_or_create(self, endpoint, name, data):
-        """Get existing resource or create new one"""
-        url = self.get_url(endpoint)
-        
-        # Check if exists
-        response = self.session.get(url, params={"name": name})
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                print(f"✓ {endpoint} '{name}' already exists (ID: {results[0]['id']})")
-                return results[0]
-        
-        # Create new
-        response = self.session.post(url, json=data)
-        if response.status_code in [201, 200]:
-            result = response.json()
-            print(f"✓ Created {endpoint} '{name}' (ID: {result['id']})")
-            return result
-        else:
+    def list_all(self, url, params=None):
+        """Return every result of a list endpoint, following `next` links"""
+        results = []
+        params = dict(params or {}, page_size=self.PAGE_SIZE)
+        while url:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            page = response.json()
+            results.extend(page.get("results", []))
+            # The next link already carries the query string.
+            url = urljoin(self.host, page["next"]) if page.get("next") else None
+            params = None
+        return results
+
+    def ensure(self, endpoint, desired):
+        """Create the named object, or patch the fields that differ from `desired`"""
+        name = desired["name"]
+        current = self.index.get(endpoint, name)
+        if current is None:
+            if self.plan:
+                self.count_changes(created=1)
+                print(f"+ Would create {endpoint} '{name}'")
+                return dict(desired, id=None)
+            response = self.session.post(self.get_url(endpoint), json=desired)
+            if response.status_code in [201, 200]:
+                result = response.json()
+                print(f"✓ Created {endpoint} '{name}' (ID: {result['id']})")
+                self.count_changes(created=1)
+                self.index.put(endpoint, result)
+                return result
             print(f"✗ Failed to create {endpoint} '{name}'")
             print(f"  Status: {response.status_code}")
             print(f"  Response: {response.text}")
             return None
 
+        changes = field_changes(current, desired, label=f"{endpoint} '{name}'")
+        if not changes:
+            print(f"✓ {endpoint} '{name}' is up to date (ID: {current['id']})")
+            return current
+
+        verb = "Would update" if self.plan else "Updating"
+        print(f"~ {verb} {endpoint} '{name}' (ID: {current['id']})")
+        for key, value in changes.items():
+            print(f"    {describe_change(key, current.get(key), value)}")
+        if self.plan:
+            self.count_changes(updated=1)
+            return current
+        response = self.session.patch(self.get_url(f"{endpoint}/{current['id']}"), json=changes)
+        if response.status_code == 200:
+            result = response.json()
+            self.count_changes(updated=1)
+            self.index.put(endpoint, result)
+            return result
+        print(f"✗ Failed to update {endpoint} '{name}'")
+        print(f"  Status: {response.status_code}")
+        print(f"  Response: {response.text}")
+        return None
+
     def get_inventory(self):
         """Get default inventory"""
-        url = self.get_url("inventories")
-        response = self.session.get(url, params={"name": "Demo Inventory"})
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                print(f"✓ Found default inventory (ID: {results[0]['id']})")
-                return results[0]
-        
-        # If not found, get first inventory
-        response = self.session.get(url)
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                print(f"✓ Using inventory: {results[0]['name']} (ID: {results[0]['id']})")
-                return results[0]
-        
-        print("✗ No inventory found")
+        inventory = self.index.get("inventories", "Demo Inventory")
+        if inventory:
+            print(f"✓ Found default inventory (ID: {inventory['id']})")
+            return inventory
+
+        # Only fall back when the choice is unambiguous.
+        inventories = self.index.all("inventories")
+        if len(inventories) == 1:
+            print(f"✓ Using inventory: {inventories[0]['name']} (ID: {inventories[0]['id']})")
+            return inventories[0]
+
+        if inventories:
+            print(f"✗ No default inventory and {len(inventories)} others to choose from")
+        else:
+            print("✗ No inventory found")
         return None
 
-    def create_project(self):
-        """Create or get AWX project"""
-        print(f"\n📦 Setting up project: {PROJECT_NAME}")
-        project_data = {
-            "name": PROJECT_NAME,
-            "description": "DevOps-KT repository",
-            "scm_type": "git",
-            "scm_url": GIT_URL,
-            "scm_branch": "",
-            "scm_clean": True,
-            "scm_delete_on_update": False,
-            "scm_update_on_launch": True,
-            "scm_update_cache_timeout": 0,
-        }
-        
-        project = self.get_or_create("projects", PROJECT_NAME, project_data)
-        return project
+    def create_project(self, desired):
+        """Create or update the AWX project"""
+        print(f"\n📦 Setting up project: {desired['name']}")
+        return self.ensure("projects", desired)
 
-    def create_job_template(self, project, inventory):
-        """Create job template"""
+    def create_job_template(self, desired, project, inventory):
+        """Create or update the job template"""
         if not project or not inventory:
             print("✗ Cannot create job template without project and inventory")
             return None
-        
-        print(f"\n🎯 Setting up job template: {JOB_TEMPLATE_NAME}")
-        
-        # Extra vars for ansible connection
-        extra_vars = {
-            "ansible_user": "azureuser",
-            "ansible_password": "xxx",
-        }
-        
-        job_data = {
-            "name": JOB_TEMPLATE_NAME,
-            "description": f"Job template for {PLAYBOOK_NAME}",
-            "project": project["id"],
-            "playbook": PLAYBOOK_NAME,
-            "inventory": inventory["id"],
-            "ask_inventory": False,
-            "ask_credential": False,
-            "ask_variables_on_launch": True,
-            "verbosity": 0,
-            "extra_vars": json.dumps(extra_vars),
-            "limit": "",
-            "forks": 0,
-            "use_fact_cache": False,
-        }
-        
-        url = self.get_url("job_templates")
-        
-        # Check if exists
-        response = self.session.get(url, params={"name": JOB_TEMPLATE_NAME})
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                job_template = results[0]
-                print(f"✓ {JOB_TEMPLATE_NAME} already exists (ID: {job_template['id']})")
-                
-                # Update the template with new settings
-                update_url = self.get_url(f"job_templates/{job_template['id']}")
-                update_response = self.session.patch(update_url, json=job_data)
-                if update_response.status_code == 200:
-                    print(f"✓ Updated job template settings")
-                    return update_response.json()
-                return job_template
-        
-        # Create new
-        response = self.session.post(url, json=job_data)
-        if response.status_code in [201, 200]:
-            result = response.json()
-            print(f"✓ Created job template '{JOB_TEMPLATE_NAME}' (ID: {result['id']})")
-            return result
-        else:
-            print(f"✗ Failed to create job template")
-            print(f"  Status: {response.status_code}")
-            print(f"  Response: {response.text}")
-            return None
+
+        print(f"\n🎯 Setting up job template: {desired['name']}")
+        job_data = dict(desired, project=project["id"], inventory=inventory["id"])
+        job_data["extra_vars"] = json.dumps(desired.get("extra_vars") or {})
+        return self.ensure("job_templates", job_data)
 
     def launch_job_template(self, job_template):
         """Launch the job template"""
@@ -189,7 +442,10 @@ class AWXClient:
             print("✗ Cannot launch job template")
             return None
         
-        print(f"\n🚀 Launching job template: {JOB_TEMPLATE_NAME}")
+        print(f"\n🚀 Launching job template: {job_template['name']}")
+        if self.plan:
+            print("  Would launch the job template")
+            return job_template
         url = self.get_url(f"job_templates/{job_template['id']}/launch")
         
         response = self.session.post(url, json={})
@@ -205,135 +461,204 @@ class AWXClient:
             print(f"  Response: {response.text}")
             return None
 
-    def create_inventory(self):
-        """Create or get inventory"""
-        print(f"\n📦 Setting up inventory: {INVENTORY_NAME}")
-        url = self.get_url("inventories")
-        
-        # Check if exists
-        response = self.session.get(url, params={"name": INVENTORY_NAME})
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                inventory = results[0]
-                print(f"✓ Inventory '{INVENTORY_NAME}' already exists (ID: {inventory['id']})")
-                return inventory
-        
-        # Create new
-        inventory_data = {
-            "name": INVENTORY_NAME,
-            "description": INVENTORY_DESCRIPTION,
-            "organization": 1,
-        }
-        
-        response = self.session.post(url, json=inventory_data)
-        if response.status_code in [201, 200]:
-            inventory = response.json()
-            print(f"✓ Created inventory '{INVENTORY_NAME}' (ID: {inventory['id']})")
-            return inventory
-        else:
-            print(f"✗ Failed to create inventory")
-            print(f"  Status: {response.status_code}")
-            print(f"  Response: {response.text}")
-            return None
+    def create_inventory(self, desired):
+        """Create or update the inventory"""
+        print(f"\n📦 Setting up inventory: {desired['name']}")
+        return self.ensure("inventories", desired)
 
-    def add_host(self, inventory, host_data):
-        """Add host to inventory"""
-        host_name = host_data["name"]
-        print(f"  🖥️  Adding host: {host_name}")
-        
-        url = self.get_url(f"inventories/{inventory['id']}/hosts")
-        
-        # Check if exists
-        response = self.session.get(url, params={"name": host_name})
-        if response.status_code == 200:
-            results = response.json().get("results", [])
-            if results:
-                host = results[0]
-                print(f"    ✓ Host '{host_name}' already exists (ID: {host['id']})")
-                # Update variables if needed
-                return self.update_host(host, host_data)
-        
-        # Create new
-        host_payload = {
+    @staticmethod
+    def host_payload(host_data):
+        return {
             "name": host_data["name"],
             "description": host_data.get("description", ""),
-            "variables": json.dumps(host_data.get("variables", {}))
+            "variables": json.dumps(host_data.get("variables", {})),
         }
-        
-        response = self.session.post(url, json=host_payload)
-        if response.status_code in [201, 200]:
-            host = response.json()
-            print(f"    ✓ Created host '{host_name}' (ID: {host['id']})")
-            return host
-        else:
-            print(f"    ✗ Failed to create host '{host_name}'")
-            print(f"      Status: {response.status_code}")
-            print(f"      Response: {response.text}")
+
+    @staticmethod
+    def host_changes(host, payload):
+        """Fields of `payload` that differ from an existing host"""
+        # Variables entered in the UI may be YAML; compare them by value.
+        return field_changes(dict(host, description=host.get("description") or ""), payload)
+
+    def bulk_create_hosts(self, inventory, payloads, concurrency=8):
+        """Create hosts through bulk/host_create, or one by one on older AWX
+
+        Returns (created, failed): how many hosts AWX confirmed and how many
+        it did not create.
+        """
+        chunks = [
+            payloads[i:i + self.BULK_HOST_CHUNK]
+            for i in range(0, len(payloads), self.BULK_HOST_CHUNK)
+        ]
+        if not chunks:
+            return 0, 0
+
+        url = self.get_url("bulk/host_create")
+        response = self.session.post(url, json={"inventory": inventory["id"], "hosts": chunks[0]})
+        if response.status_code == 404:
+            # The bulk API arrived in AWX 22; fall back to per-host POSTs.
+            print("  ℹ bulk/host_create not available, creating hosts one by one")
+            hosts_url = self.get_url(f"inventories/{inventory['id']}/hosts")
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                responses = list(pool.map(lambda payload: self.session.post(hosts_url, json=payload), payloads))
+            failed = [r for r in responses if r.status_code not in [201, 200]]
+            for r in failed:
+                print(f"    ✗ Failed to create host: {r.status_code} {r.text}")
+            return len(responses) - len(failed), len(failed)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            responses = [response] + list(
+                pool.map(
+                    lambda chunk: self.session.post(url, json={"inventory": inventory["id"], "hosts": chunk}),
+                    chunks[1:],
+                )
+            )
+        created = failed = 0
+        for chunk, r in zip(chunks, responses):
+            if r.status_code in [201, 200]:
+                created += len(r.json().get("hosts", chunk))
+            else:
+                failed += len(chunk)
+                print(f"    ✗ Bulk host create failed: {r.status_code} {r.text}")
+        return created, failed
+
+    def sync_hosts(self, inventory, hosts, concurrency=8):
+        """Make the inventory's hosts match `hosts`, writing only what changed
+
+        Existing hosts are read in one paginated sweep and compared locally;
+        missing hosts are created in bulk and only changed hosts are patched.
+        Hosts that exist in AWX but not in `hosts` are left untouched.
+        """
+        print(f"\n🖥️  Syncing {len(hosts)} hosts into inventory '{inventory['name']}'")
+        existing = {}
+        if inventory["id"] is not None:  # None: the inventory would be created (--plan)
+            existing = {
+                host["name"]: host for host in self.index.all(f"inventories/{inventory['id']}/hosts")
+            }
+
+        to_create = []
+        to_update = []
+        for host_data in hosts:
+            payload = self.host_payload(host_data)
+            host = existing.get(payload["name"])
+            if host is None:
+                to_create.append(payload)
+            else:
+                changes = self.host_changes(host, payload)
+                if changes:
+                    to_update.append((host, changes))
+
+        unchanged = len(hosts) - len(to_create) - len(to_update)
+        unmanaged = set(existing) - {host_data["name"] for host_data in hosts}
+        if self.plan:
+            self.count_changes(created=len(to_create), updated=len(to_update))
+            for payload in to_create:
+                print(f"  + Would create host '{payload['name']}'")
+            for host, changes in to_update:
+                fields = ", ".join(describe_change(key, host.get(key), value) for key, value in changes.items())
+                print(f"  ~ Would update host '{host['name']}': {fields}")
+            print(f"  Hosts: {len(to_create)} to create, {len(to_update)} to update, {unchanged} unchanged")
+            return {"created": len(to_create), "updated": len(to_update), "unchanged": unchanged}
+
+        created, failed_creates = self.bulk_create_hosts(inventory, to_create, concurrency)
+
+        def patch(item):
+            host, changes = item
+            return self.session.patch(self.get_url(f"hosts/{host['id']}"), json=changes)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            responses = list(pool.map(patch, to_update))
+        failed_updates = [r for r in responses if r.status_code != 200]
+        for r in failed_updates:
+            print(f"    ✗ Failed to update host: {r.status_code} {r.text}")
+        updated = len(responses) - len(failed_updates)
+        # Only count what AWX confirmed.
+        self.count_changes(created=created, updated=updated)
+
+        failed = failed_creates + len(failed_updates)
+        mark = "✗" if failed else "✓"
+        print(
+            f"  {mark} Hosts: {created} created, {updated} updated, {unchanged} unchanged"
+            + (f", {failed} failed" if failed else "")
+        )
+        if unmanaged:
+            print(f"  ℹ {len(unmanaged)} other hosts in the inventory were left untouched")
+        if failed:
             return None
+        return {"created": created, "updated": updated, "unchanged": unchanged}
 
-    def update_host(self, host, host_data):
-        """Update host variables"""
-        url = self.get_url(f"hosts/{host['id']}")
-        
-        payload = {
-            "variables": json.dumps(host_data.get("variables", {}))
-        }
-        
-        response = self.session.patch(url, json=payload)
-        if response.status_code in [200]:
-            print(f"    ✓ Updated host variables")
-            return response.json()
-        else:
-            print(f"    ✗ Failed to update host")
-            return host
+    def setup_inventory(self, desired):
+        """Create the custom inventory, falling back to the default one"""
+        return self.create_inventory(desired) or self.get_inventory()
 
-    def setup(self, launch=False):
+    def setup(self, state, launch=False, concurrency=8):
         """Setup project, job template, and inventory"""
         print("=" * 60)
         print("AWX Setup: Project, Job Template, and Inventory")
         print("=" * 60)
+        started = time.perf_counter()
         
         try:
-            # Create project
-            project = self.create_project()
-            if not project:
-                return False
-            
-            # Create custom inventory
-            inventory = self.create_inventory()
-            if not inventory:
-                # Fall back to default inventory
-                inventory = self.get_inventory()
-                if not inventory:
-                    return False
-            
-            # Add hosts to inventory
-            for host_data in HOSTS:
-                self.add_host(inventory, host_data)
-            
-            # Create job template
-            job_template = self.create_job_template(project, inventory)
-            if not job_template:
-                return False
-            
-            # Launch if requested
+            # Project and inventory are independent; the host sync only needs
+            # the inventory, the job template needs both.
+            graph = TaskGraph(max_workers=concurrency)
+            graph.add("project", lambda: self.create_project(state["project"]))
+            graph.add("inventory", lambda: self.setup_inventory(state["inventory"]))
+            graph.add(
+                "hosts",
+                lambda inventory: self.sync_hosts(inventory, state["hosts"], concurrency),
+                deps=["inventory"],
+            )
+            graph.add(
+                "job_template",
+                lambda project, inventory: self.create_job_template(state["job_template"], project, inventory),
+                deps=["project", "inventory"],
+            )
             if launch:
-                self.launch_job_template(job_template)
+                graph.add("launch", self.launch_job_template, deps=["job_template"])
+            results = graph.run()
+
+            project = results["project"]
+            inventory = results["inventory"]
+            job_template = results["job_template"]
+            failed = [
+                name
+                for name in ("project", "inventory", "hosts", "job_template")
+                if results[name] is None
+            ]
+            if launch and results["launch"] is None:
+                failed.append("launch")
+            if failed:
+                created, updated = self.changes["created"], self.changes["updated"]
+                print("\n" + "=" * 60)
+                print(f"✗ Setup failed: {', '.join(failed)}")
+                print(f"Changes made before the failure: {created} created, {updated} updated")
+                print("=" * 60)
+                return False
             
+            created, updated = self.changes["created"], self.changes["updated"]
             print("\n" + "=" * 60)
+            if self.plan:
+                print(f"Plan: {created} to create, {updated} to update")
+                print("=" * 60)
+                return True
             print("✓ Setup completed successfully!")
             print("=" * 60)
-            print(f"\nProject: {PROJECT_NAME}")
-            print(f"  Git URL: {GIT_URL}")
+            print(f"\nProject: {project['name']}")
+            print(f"  Git URL: {project.get('scm_url')}")
             print(f"  Project ID: {project['id']}")
-            print(f"\nInventory: {INVENTORY_NAME}")
+            print(f"\nInventory: {inventory['name']}")
             print(f"  Inventory ID: {inventory['id']}")
-            print(f"  Hosts: {len(HOSTS)}")
-            print(f"\nJob Template: {JOB_TEMPLATE_NAME}")
-            print(f"  Playbook: {PLAYBOOK_NAME}")
+            print(f"  Hosts: {len(state['hosts'])}")
+            print(f"\nJob Template: {job_template['name']}")
+            print(f"  Playbook: {job_template.get('playbook')}")
             print(f"  Job Template ID: {job_template['id']}")
             print(f"\nAccess AWX at: {AWX_HOST}")
+            if created or updated:
+                print(f"Changes: {created} created, {updated} updated")
+            else:
+                print("No changes: AWX already matches the state file")
+            print(f"Finished in {time.perf_counter() - started:.1f}s")
             
             return True
             
@@ -341,10 +666,12 @@ class AWXClient:
             print(f"✗ Error during setup: {e}")
             return False
 
+        finally:
+            self.session.report()
+
 
 def main():
     import argparse
-    import os
     
     parser = argparse.ArgumentParser(
         description="Setup AWX Project and Job Template",
@@ -359,13 +686,29 @@ def main():
     parser.add_argument("--username", default=AWX_USERNAME, help="AWX username (default: %(default)s)")
     parser.add_argument("--password", required=True, help="AWX password (or set AWX_PASSWORD env var)")
     parser.add_argument("--launch", action="store_true", help="Launch job template after creation")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum parallel API calls (default: %(default)s)")
+    parser.add_argument("--config", default=DEFAULT_STATE_FILE, help="Desired state file (default: %(default)s)")
+    parser.add_argument("--plan", action="store_true", help="Show what would change without writing anything")
+    parser.add_argument("--connect-timeout", type=float, default=5, help="Seconds to wait for a connection (default: %(default)s)")
+    parser.add_argument("--read-timeout", type=float, default=30, help="Seconds to wait for a response (default: %(default)s)")
+    parser.add_argument("--retries", type=int, default=4, help="Retries for failed or throttled calls (default: %(default)s)")
     
     args = parser.parse_args()
+    state = load_state(args.config)
     
     print(f"Connecting to AWX at: {args.host}")
     
-    client = AWXClient(args.host, args.username, args.password)
-    success = client.setup(launch=args.launch)
+    client = AWXClient(
+        args.host,
+        args.username,
+        args.password,
+        plan=args.plan,
+        concurrency=args.concurrency,
+        connect_timeout=args.connect_timeout,
+        read_timeout=args.read_timeout,
+        retries=args.retries,
+    )
+    success = client.setup(state, launch=args.launch, concurrency=args.concurrency)
     
     sys.exit(0 if success else 1)
 
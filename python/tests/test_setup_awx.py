@@ -0,0 +1,218 @@
+"""setup_awx.py against fake_awx.py served on an ephemeral port."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_awx  # noqa: E402
+import setup_awx  # noqa: E402
+from setup_awx import AWXClient, TaskGraph  # noqa: E402
+
+HOST_COUNT = 250  # three bulk/host_create chunks
+
+
+def start_fake(**options):
+    server = fake_awx.serve(0, 0, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def fake():
+    server = start_fake()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def state():
+    state = setup_awx.load_state(setup_awx.DEFAULT_STATE_FILE)
+    state["hosts"] = [
+        {"name": f"host-{i:03d}", "variables": {"ansible_host": f"10.0.{i // 200}.{i % 200}"}}
+        for i in range(HOST_COUNT)
+    ]
+    return state
+
+
+def client(server, **options):
+    return AWXClient(f"http://127.0.0.1:{server.server_port}", "admin", "password", **options)
+
+
+def writes(server):
+    stats = server.awx.stats
+    return {method: stats.get(method, 0) for method in ("POST", "PATCH")}
+
+
+def objects(server):
+    return {kind: len(items) for kind, items in server.awx.objects.items()}
+
+
+def test_graph_runs_tasks_after_their_dependencies():
+    events = []
+    lock = threading.Lock()
+
+    def task(name, seconds=0.0):
+        def run(*deps):
+            with lock:
+                events.append(("start", name))
+            time.sleep(seconds)
+            with lock:
+                events.append(("end", name))
+            return name
+        return run
+
+    graph = TaskGraph(max_workers=4)
+    graph.add("a", task("a", 0.1))
+    graph.add("b", task("b", 0.1))
+    graph.add("c", task("c"), deps=["a", "b"])
+    graph.add("d", task("d"), deps=["c"])
+    started = time.monotonic()
+    results = graph.run()
+
+    assert results == {"a": "a", "b": "b", "c": "c", "d": "d"}
+    assert events.index(("start", "c")) > max(events.index(("end", "a")), events.index(("end", "b")))
+    assert events.index(("start", "d")) > events.index(("end", "c"))
+    # a and b are independent and ran side by side.
+    assert time.monotonic() - started < 0.19
+
+
+def test_graph_passes_dependency_results():
+    graph = TaskGraph()
+    graph.add("x", lambda: 2)
+    graph.add("y", lambda: 3)
+    graph.add("product", lambda x, y: x * y, deps=["x", "y"])
+    assert graph.run()["product"] == 6
+
+
+def test_graph_skips_dependents_of_failed_tasks():
+    called = []
+
+    def boom():
+        raise RuntimeError("boom")
+
+    graph = TaskGraph()
+    graph.add("raises", boom)
+    graph.add("returns_none", lambda: None)
+    graph.add("ok", lambda: "ok")
+    graph.add("after_raise", lambda value: called.append("after_raise"), deps=["raises"])
+    graph.add("after_none", lambda value: called.append("after_none"), deps=["returns_none"])
+    graph.add("transitive", lambda value: called.append("transitive"), deps=["after_raise"])
+    graph.add("after_ok", lambda value: value.upper(), deps=["ok"])
+    results = graph.run()
+
+    assert called == []
+    assert results["after_raise"] is None
+    assert results["after_none"] is None
+    assert results["transitive"] is None
+    assert results["after_ok"] == "OK"
+
+
+def test_graph_rejects_unknown_dependencies():
+    graph = TaskGraph()
+    with pytest.raises(ValueError):
+        graph.add("orphan", lambda value: value, deps=["missing"])
+
+
+def test_first_run_creates_everything_and_rerun_writes_nothing(fake, state):
+    assert client(fake).setup(state, launch=True) is True
+    # project, inventory, 3 bulk host chunks, job template, launch
+    assert writes(fake) == {"POST": 7, "PATCH": 0}
+    assert objects(fake) == {"projects": 1, "inventories": 2, "job_templates": 1, "hosts": HOST_COUNT}
+
+    rerun = client(fake)
+    assert rerun.setup(state) is True
+    assert writes(fake) == {"POST": 7, "PATCH": 0}
+    assert rerun.changes == {"created": 0, "updated": 0}
+
+
+def test_changed_state_patches_only_the_differences(fake, state):
+    assert client(fake).setup(state) is True
+    before = writes(fake)
+    state["job_template"]["forks"] = 5
+    state["hosts"][0]["variables"]["ansible_host"] = "10.9.9.9"
+    state["hosts"].append({"name": "host-new"})
+
+    plan = client(fake, plan=True)
+    assert plan.setup(state) is True
+    assert writes(fake) == before
+    assert plan.changes == {"created": 1, "updated": 2}
+
+    apply = client(fake)
+    assert apply.setup(state) is True
+    assert apply.changes == {"created": 1, "updated": 2}
+    assert writes(fake) == {"POST": before["POST"] + 1, "PATCH": 2}
+
+
+def test_failed_host_sync_fails_the_run(fake, state, monkeypatch):
+    monkeypatch.setattr(AWXClient, "bulk_create_hosts", lambda self, inventory, payloads, concurrency=8: (0, len(payloads)))
+    failing = client(fake)
+    assert failing.setup(state) is False
+    assert failing.changes["created"] == 3  # project, inventory, job template; no hosts
+
+
+def test_run_converges_when_awx_returns_503s(state):
+    server = start_fake(fail_rate=0.3, retry_after=0)
+    try:
+        first = client(server, retries=10)
+        assert first.setup(state, launch=True) is True
+        assert server.awx.stats["503"] > 0
+        assert objects(server) == {"projects": 1, "inventories": 2, "job_templates": 1, "hosts": HOST_COUNT}
+        assert sum(entry["retries"] for entry in first.session.stats.values()) > 0
+
+        rerun = client(server, retries=10)
+        assert rerun.setup(state) is True
+        assert rerun.changes == {"created": 0, "updated": 0}
+    finally:
+        server.shutdown()
+
+
+def test_stalled_reads_time_out_and_are_retried(state):
+    server = start_fake(stall_rate=1.0, stall=0.5)
+    try:
+        stalled = client(server, read_timeout=0.1, retries=1)
+        started = time.monotonic()
+        assert stalled.setup(state) is False
+        # Every call gave up after its read timeout instead of waiting.
+        assert time.monotonic() - started < 5
+        assert any(entry["retries"] for entry in stalled.session.stats.values())
+    finally:
+        server.shutdown()
+
+
+def test_connection_pool_covers_nested_concurrency(state, caplog):
+    # Per-host POSTs run in the host sync's pool while the other graph tasks
+    # make requests of their own.
+    server = fake_awx.serve(0, 0.01, bulk=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with caplog.at_level("WARNING", logger="urllib3.connectionpool"):
+            assert client(server, concurrency=4).setup(state, launch=True, concurrency=4)
+    finally:
+        server.shutdown()
+    assert "Connection pool is full" not in caplog.text
+
+
+@pytest.mark.parametrize(
+    "text, message",
+    [
+        ("- project\n", "expected a mapping of sections"),
+        ("project: x\ninventory: {name: i}\njob_template: {name: j}\n", "'project' must be a mapping"),
+        ("project: {name: p}\ninventory: {name: i}\njob_template: {name: j}\nhosts: {a: 1}\n", "'hosts' must be a list"),
+    ],
+)
+def test_load_state_rejects_malformed_sections(tmp_path, text, message):
+    path = tmp_path / "awx.yaml"
+    path.write_text(text)
+    with pytest.raises(SystemExit, match=message):
+        setup_awx.load_state(str(path))
+
+
+def test_load_state_accepts_an_empty_hosts_key(tmp_path):
+    path = tmp_path / "awx.yaml"
+    path.write_text("project: {name: p}\ninventory: {name: i}\njob_template: {name: j}\nhosts:\n")
+    assert setup_awx.load_state(str(path))["hosts"] == []